@@ -1,9 +1,12 @@
 from robot.api.deco import library, keyword
+from robot.libraries.BuiltIn import BuiltIn
 import requests
-import time
+from requests.adapters import HTTPAdapter
 import os
 import json
-import subprocess
+import time
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import sys
 
@@ -12,217 +15,593 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 if current_dir not in sys.path:
     sys.path.append(current_dir)
 
-# Try to import the NVDADirect module
-try:
-    from nvda_direct import NVDADirect
-    NVDA_DIRECT_AVAILABLE = True
-except ImportError:
-    NVDA_DIRECT_AVAILABLE = False
-    print("NVDADirect module not available. Direct NVDA control will be limited.")
+from nvda_backends import BridgeBackend, DirectBackend, InProcessMockBackend
+from speech_log import SpeechLogWriter
+from speech_matcher import SpeechMatcher
+from speech_cache import SpeechCache
+from speech_baseline import SpeechBaseline
+from speech_events import SpeechEventStream
+from latency_stats import LatencyRecorder
+
+
+def timed(method):
+    """Record the duration of a keyword in the library's latency stats."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.latency.measure(f"keyword:{method.__name__}"):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _as_bool(value):
+    """Read a flag given as a bool or as a string from Robot Framework or the environment."""
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return value
 
-@library
+
+@library(scope="SUITE")
 class GuidepupLibrary:
-    """Library for controlling NVDA screen reader using Guidepup through a Node.js bridge or direct execution."""
+    """Library for controlling NVDA screen reader using Guidepup through a Node.js bridge or direct execution.
+    
+    The screen reader is driven by a backend: ``bridge`` (Guidepup bridge),
+    ``mock`` (Node.js mock bridge), ``direct`` (NVDA started directly) or
+    ``inprocess`` (mock answered in Python). Pass ``backend`` or set
+    ``GUIDEPUP_BACKEND`` to choose one; otherwise it follows ``use_mock`` and
+    ``use_direct_nvda``.
+    """
     
-    BRIDGE_URL = "http://localhost:3000"
+    DEFAULT_BRIDGE_PORT = 3000
+    BACKENDS = ("bridge", "mock", "direct", "inprocess")
     NVDA_PATH = "C:\\Program Files (x86)\\NVDA\\nvda.exe"
     
-    def __init__(self, use_mock=False, use_direct_nvda=True):
-        self.bridge_process = None
-        self.nvda = None
-        self.speech_log = []
+    def __init__(self, use_mock=False, use_direct_nvda=True, speech_quiet_period=0.2,
+                 startup_timeout=30, pool_size=4, connect_timeout=2, read_timeout=30,
+                 log_max_bytes=0, log_compress=True, bridge_port=None, reuse_bridge=None,
+                 speech_cache=False, speech_cache_size=5000, stream_speech=False,
+                 speech_buffer_size=1000, backend=None, speech_baseline=False, baseline_label=None,
+                 operation_timeouts=None, suite_budget=None, restart_bridge=None):
+        self.backend = None
+        self.speech_events = None
+        self.latency = LatencyRecorder()
+        self.speech_log = None
         self.log_file_path = None
         self.expected_results = {}
+        self.matcher = SpeechMatcher()
         self.use_mock = use_mock
         self.use_direct_nvda = use_direct_nvda
+        # Explicit backend choice, otherwise derived from use_mock and use_direct_nvda
+        self.backend_name = backend or os.environ.get("GUIDEPUP_BACKEND") or None
+        # Bridge port from the argument or GUIDEPUP_BRIDGE_PORT; 0 picks a free port on start
+        if bridge_port is None:
+            bridge_port = os.environ.get("GUIDEPUP_BRIDGE_PORT", self.DEFAULT_BRIDGE_PORT)
+        self.bridge_port = int(bridge_port)
+        # Keep a long-lived bridge daemon running between suites (GUIDEPUP_REUSE_BRIDGE)
+        if reuse_bridge is None:
+            reuse_bridge = os.environ.get("GUIDEPUP_REUSE_BRIDGE", "")
+        self.reuse_bridge = _as_bool(reuse_bridge)
+        # Seconds of silence after which speech is considered settled
+        self.speech_quiet_period = float(speech_quiet_period)
+        # Seconds to wait for the bridge or NVDA to become ready
+        self.startup_timeout = float(startup_timeout)
+        # One keep-alive session reused for every call to the bridge
+        self.timeout = (float(connect_timeout), float(read_timeout))
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=int(pool_size))
+        self.session.mount("http://", adapter)
+        # Read timeouts per bridge path, e.g. {"/act": 5}, over the backend's defaults
+        self.operation_timeouts = operation_timeouts
+        # Seconds all bridge calls together may take from Initialize NVDA on (GUIDEPUP_SUITE_BUDGET), 0 for no limit
+        if suite_budget is None:
+            suite_budget = os.environ.get("GUIDEPUP_SUITE_BUDGET", 0)
+        self.suite_budget = float(suite_budget)
+        # Restart a dead or unresponsive bridge and retry the failed keyword once (GUIDEPUP_RESTART_BRIDGE)
+        if restart_bridge is None:
+            restart_bridge = os.environ.get("GUIDEPUP_RESTART_BRIDGE", "")
+        self.restart_bridge = _as_bool(restart_bridge)
+        # Rotate the speech log after this many bytes (0 disables rotation)
+        self.log_max_bytes = int(log_max_bytes)
+        self.log_compress = log_compress
+        # Opt-in cache of speech keyed by accessibility properties, kept next to the logs
+        self.speech_cache = None
+        if _as_bool(speech_cache):
+            self.speech_cache = SpeechCache(os.path.join("results", "speech_cache.json"),
+                                            max_entries=speech_cache_size)
+        # Consume the bridge's speech event stream on a background thread
+        self.stream_speech = _as_bool(stream_speech)
+        self.speech_buffer_size = int(speech_buffer_size)
+        # Opt-in store of every run's speech for diffing runs against each other
+        self.speech_baseline = None
+        if _as_bool(speech_baseline):
+            self.speech_baseline = SpeechBaseline(os.path.join("results", "speech_baseline.db"))
+        self.baseline_label = baseline_label
+        self.baseline_run_id = None
+        # Page that captured speech is filed under in the baseline store
+        self.current_page = ""
+        # Speech captures started by Start Speech Capture, waited for on worker threads
+        self.capture_workers = int(pool_size)
+        self.capture_pool = None
+        self.captures = {}
+        self.capture_count = 0
+        self.last_capture = None
     
     @keyword
-    def initialize_nvda(self, use_mock=None, use_direct_nvda=None):
-        """Initialize NVDA screen reader using Guidepup bridge or direct execution."""
+    @timed
+    def initialize_nvda(self, use_mock=None, use_direct_nvda=None, attach=False):
+        """Initialize NVDA screen reader using Guidepup bridge or direct execution.
+        
+        With ``attach`` the ``direct`` backend uses an NVDA that is already
+        running, such as the one run_nvda_test.py starts, and leaves it
+        running on shutdown.
+        """
         # Allow override of mock and direct mode
         if use_mock is not None:
             self.use_mock = use_mock
         if use_direct_nvda is not None:
             self.use_direct_nvda = use_direct_nvda
-            
-        if self.use_direct_nvda and not self.use_mock:
-            # Start NVDA directly using NVDADirect if available
-            if NVDA_DIRECT_AVAILABLE:
-                self.nvda = NVDADirect(nvda_path=self.NVDA_PATH)
-                self.nvda.start()
-            else:
-                # Fall back to basic subprocess if NVDADirect not available
-                if not os.path.exists(self.NVDA_PATH):
-                    raise Exception(f"NVDA not found at {self.NVDA_PATH}")
-                print(f"Starting NVDA directly from {self.NVDA_PATH}")
-                subprocess.Popen([self.NVDA_PATH], shell=True)
-                time.sleep(5)  # Wait for NVDA to start
-        else:
-            # Start the Node.js bridge server
-            bridge_script = os.path.join(os.getcwd(), "resources", 
-                                        "mock_nvda.js" if self.use_mock else "guidepup_bridge.js")
-            
-            self.bridge_process = subprocess.Popen(["node", bridge_script], 
-                                                stdout=subprocess.PIPE, 
-                                                stderr=subprocess.PIPE)
-            
-            # Wait for the server to start
-            time.sleep(3)
-            
-            # Start NVDA through the bridge
-            response = requests.get(f"{self.BRIDGE_URL}/start")
-            if response.status_code != 200:
-                raise Exception(f"Failed to start NVDA: {response.text}")
+        
+        self.backend = self._create_backend(attach)
+        if self.suite_budget > 0 and isinstance(self.backend, BridgeBackend):
+            self.backend.deadline = time.monotonic() + self.suite_budget
+        self.backend.start()
+        
+        if self.stream_speech and isinstance(self.backend, BridgeBackend):
+            self.speech_events = SpeechEventStream(self.backend.url,
+                                                   buffer_size=self.speech_buffer_size,
+                                                   connect_timeout=self.timeout[0])
+            self.speech_events.start()
         
         # Create log directory for this test run
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        log_dir = os.path.join("results", f"nvda_logs_{timestamp}")
+        # The process id keeps logs of suites running in parallel apart
+        log_dir = os.path.join("results", f"nvda_logs_{timestamp}_{os.getpid()}")
         os.makedirs(log_dir, exist_ok=True)
-        self.log_file_path = os.path.join(log_dir, "speech_log.json")
-        self.speech_log = []
+        self.log_file_path = os.path.join(log_dir, "speech_log.jsonl")
+        self.speech_log = SpeechLogWriter(self.log_file_path, max_bytes=self.log_max_bytes,
+                                          compress=self.log_compress)
+        
+        if self.speech_baseline is not None:
+            self.baseline_run_id = self.speech_baseline.start_run(self.baseline_label, self.backend.name)
+    
+    def _resolve_backend_name(self):
+        """Name of the backend to use, from the explicit choice or the mode flags."""
+        if self.backend_name:
+            return self.backend_name
+        if self.use_mock:
+            return "mock"
+        if self.use_direct_nvda:
+            return "direct"
+        return "bridge"
+    
+    def _create_backend(self, attach=False):
+        name = self._resolve_backend_name()
+        if attach and name != "direct":
+            raise Exception(f"Only the direct backend can attach to a running NVDA, not {name}")
+        if name in ("bridge", "mock"):
+            return BridgeBackend(self.session, mock=(name == "mock"), port=self.bridge_port,
+                                 reuse=self.reuse_bridge, startup_timeout=self.startup_timeout,
+                                 timeout=self.timeout, quiet_period=self.speech_quiet_period,
+                                 latency=self.latency, operation_timeouts=self.operation_timeouts,
+                                 restart_on_failure=self.restart_bridge)
+        if name == "direct":
+            return DirectBackend(self.NVDA_PATH, startup_timeout=self.startup_timeout,
+                                 quiet_period=self.speech_quiet_period, latency=self.latency,
+                                 attach=attach)
+        if name == "inprocess":
+            return InProcessMockBackend()
+        raise Exception(f"Unknown backend '{name}', expected one of: {', '.join(self.BACKENDS)}")
+    
+    def _log_speech(self, record):
+        """Append a record to the streaming speech log and the baseline store."""
+        if self.speech_log:
+            self.speech_log.write(record)
+        if self.baseline_run_id is not None:
+            element = record.get("selector") or record.get("element_id")
+            if element:
+                self.speech_baseline.record(self.baseline_run_id, self.current_page, element,
+                                            record.get("speech", record.get("actual")),
+                                            record.get("passed"))
     
     @keyword
+    @timed
     def shutdown_nvda(self):
         """Shut down NVDA screen reader."""
+        if self.speech_events:
+            self.speech_events.stop()
+            self.speech_events = None
+        
         try:
-            if self.use_direct_nvda and not self.use_mock:
-                # Stop direct NVDA process using NVDADirect if available
-                if NVDA_DIRECT_AVAILABLE and self.nvda:
-                    self.nvda.stop()
-                else:
-                    # Fall back to taskkill
-                    subprocess.run(['taskkill', '/IM', 'nvda.exe', '/F'], capture_output=True)
-            else:
-                # Stop NVDA through the bridge
-                requests.get(f"{self.BRIDGE_URL}/stop")
-                
-                # Kill the bridge process
-                if self.bridge_process:
-                    self.bridge_process.terminate()
-                    self.bridge_process.wait(timeout=5)
+            if self.backend:
+                self.backend.stop()
         except Exception as e:
             print(f"Error shutting down NVDA: {str(e)}")
         
-        # Save speech log to file
-        if self.log_file_path and self.speech_log:
-            with open(self.log_file_path, 'w') as f:
-                json.dump(self.speech_log, f, indent=2)
+        # Captures nobody awaited end with the backend, wait for their threads
+        if self.capture_pool is not None:
+            for future in self.captures.values():
+                future.cancel()
+            self.capture_pool.shutdown(wait=True)
+            self.capture_pool = None
+        self.captures = {}
+        self.last_capture = None
+        
+        if self.speech_cache is not None:
+            self.speech_cache.save()
+        
+        if self.baseline_run_id is not None:
+            self.speech_baseline.finish_run(self.baseline_run_id)
+            self.baseline_run_id = None
+        
+        # Records are already on disk, just close the log
+        if self.speech_log:
+            self.speech_log.close()
+            self.speech_log = None
+            # Timing summary for the run goes next to the speech log
+            self.latency.write(os.path.join(os.path.dirname(self.log_file_path), "timings.json"))
+    
+    @keyword
+    @timed
+    def stop_bridge_daemon(self):
+        """Stop NVDA and shut down a bridge daemon left running by ``reuse_bridge``."""
+        backend = self.backend
+        if not isinstance(backend, BridgeBackend):
+            backend = self._create_backend()
+            if not isinstance(backend, BridgeBackend):
+                return
+        try:
+            backend.stop_daemon()
+        except requests.exceptions.RequestException as e:
+            print(f"No bridge daemon to stop at {backend.url}: {str(e)}")
     
     @keyword
+    @timed
     def load_expected_results(self, file_path):
         """Load expected screen reader output from a JSON file."""
         with open(file_path, 'r') as f:
             self.expected_results = json.load(f)
+        # Compile the expectations once so verification is a dictionary lookup
+        self.matcher = SpeechMatcher(self.expected_results)
     
     @keyword
-    def focus_element(self, selector, timeout=5):
-        """Focus on an element and return NVDA's speech output."""
-        if self.use_direct_nvda and not self.use_mock:
-            # With direct NVDA, we try to capture speech through NVDADirect
-            if NVDA_DIRECT_AVAILABLE and self.nvda:
-                # In a real implementation, we would need to integrate with NVDA's speech capture
-                # For now, we simulate it
-                simulated_speech = f"Element focused: {selector}"
-                self.nvda.simulate_speech(simulated_speech)
-                speech = self.nvda.get_speech()
-            else:
-                # Fallback to simulated speech
-                time.sleep(1)  # Wait for NVDA to speak
-                speech = f"Element focused: {selector}"  # Simulated speech for direct NVDA
-                
-            element_info = {
-                "selector": selector,
-                "timestamp": datetime.now().isoformat(),
-                "speech": speech
-            }
-            self.speech_log.append(element_info)
-            return speech
-        else:
-            # For mock mode, use the focus endpoint
-            if self.use_mock:
-                response = requests.get(f"{self.BRIDGE_URL}/focus", params={"selector": selector})
-                if response.status_code != 200:
-                    raise Exception(f"Failed to focus element: {response.text}")
-                    
-            # When an element is focused in the browser, the screen reader announces it
-            # We simulate pressing Enter to activate the screen reader
-            requests.get(f"{self.BRIDGE_URL}/act")
-            time.sleep(1)  # Wait for screen reader to respond
-            
-            # Get the last spoken phrase
-            response = requests.get(f"{self.BRIDGE_URL}/speak")
-            data = response.json()
-            speech = data.get('speech', '')
-            
-            # Capture and log the speech
-            element_info = {
-                "selector": selector,
+    @timed
+    def focus_element(self, selector, timeout=5, properties=None):
+        """Focus on an element and return NVDA's speech output.
+        
+        Speech is read as soon as the screen reader stops talking, waiting at
+        most ``timeout`` seconds. When the speech cache is enabled and the
+        element's accessibility ``properties`` (role, name, state, ...) are
+        given, speech cached for identical properties on the same backend is
+        returned without involving the screen reader.
+        """
+        backend = self._require_backend()
+        if self.speech_cache is not None and properties:
+            speech = self.speech_cache.get(selector, properties, backend.name)
+            if speech is not None:
+                self._log_speech({
+                    "selector": selector,
+                    "timestamp": datetime.now().isoformat(),
+                    "speech": speech,
+                    "cached": True
+                })
+                return speech
+        
+        speech = backend.focus(selector, timeout)
+        
+        # Placeholder speech must not stand in for the screen reader on later runs
+        if self.speech_cache is not None and properties and not backend.speech_is_simulated():
+            self.speech_cache.put(selector, properties, speech, backend.name)
+        
+        # Capture and log the speech
+        element_info = {
+            "selector": selector,
+            "timestamp": datetime.now().isoformat(),
+            "speech": speech
+        }
+        self._log_speech(element_info)
+        return speech
+    
+    @keyword
+    @timed
+    def set_current_page(self, page):
+        """Set the page that speech captured from now on belongs to in the baseline store."""
+        self.current_page = page
+    
+    @keyword
+    @timed
+    def diff_speech_against_baseline(self, baseline_run=None, last=1):
+        """Compare this run's speech with a baseline run, or with the last runs before it.
+        
+        Without ``baseline_run`` only earlier runs with the same label and
+        backend count towards ``last``, so other suites' runs are skipped.
+        
+        Requires ``speech_baseline=True``. Returns dictionaries with ``page``,
+        ``element``, ``status`` (added, changed or removed), ``baseline`` and
+        ``current`` speech; an empty list means nothing changed.
+        """
+        if self.baseline_run_id is None:
+            raise Exception("The speech baseline store is not enabled, import the library with "
+                            "speech_baseline=True and initialize NVDA")
+        if baseline_run is not None:
+            baseline_run = int(baseline_run)
+        return self.speech_baseline.diff(self.baseline_run_id, baseline_run, int(last))
+    
+    @keyword
+    @timed
+    def invalidate_speech_cache(self, selector=None):
+        """Forget cached speech for ``selector``, or for every element if none is given.
+        
+        Returns the number of cache entries removed.
+        """
+        if self.speech_cache is None:
+            return 0
+        removed = self.speech_cache.invalidate(selector)
+        self.speech_cache.save()
+        return removed
+    
+    @keyword
+    @timed
+    def is_speech_cache_enabled(self):
+        """Return whether captured speech is cached between runs."""
+        return self.speech_cache is not None
+    
+    @keyword
+    @timed
+    def capture_speech_for_elements(self, selectors, timeout=5):
+        """Focus each selector in turn and capture NVDA's speech for it.
+        
+        Only available with the ``mock`` and ``inprocess`` backends: with a
+        real screen reader focus is driven by the browser, so focus each
+        element there and use ``Focus Element`` instead. The mock bridge
+        handles all selectors in a single ``/batch`` request. Returns a list
+        of dictionaries with ``selector`` and ``speech`` keys, in the order
+        the selectors were given.
+        """
+        if not self.is_using_mock():
+            raise Exception(f"Capture Speech For Elements only works with a mock backend, the "
+                            f"{self._resolve_backend_name()} backend cannot move focus to a selector")
+        captured = self._require_backend().capture_many(list(selectors), timeout)
+        for item in captured:
+            self._log_speech({
+                "selector": item["selector"],
                 "timestamp": datetime.now().isoformat(),
-                "speech": speech
-            }
-            self.speech_log.append(element_info)
-            return speech
-    
-    @keyword
-    def verify_element_speech(self, element_id, speech=None, expected=None):
-        """Verify the speech output for an element against expected results."""
-        if self.use_direct_nvda and not self.use_mock:
-            # With direct NVDA, get speech via NVDADirect if available
-            if NVDA_DIRECT_AVAILABLE and self.nvda and not speech:
-                speech = self.nvda.get_speech()
-            # Otherwise use provided speech or a default value
-            elif not speech:
+                "speech": item["speech"]
+            })
+        return captured
+    
+    @keyword
+    @timed
+    def verify_element_speech(self, element_id, speech=None, expected=None, fail_on_mismatch=True):
+        """Verify the speech output for an element against expected results.
+        
+        ``expected`` overrides the loaded expectation and may be a plain
+        substring or a dictionary of checks (see ``speech_matcher``). Fails
+        listing every failed check unless ``fail_on_mismatch`` is false.
+        Returns a dictionary with ``passed`` and a ``diffs`` list describing
+        each failed check.
+        """
+        # Read the current speech if it was not provided
+        if not speech:
+            speech = self._require_backend().speak()
+            if speech is None:
                 speech = f"Simulated speech for {element_id}"
-        else:
-            # Get speech from bridge if not provided
-            if not speech:
-                response = requests.get(f"{self.BRIDGE_URL}/speak")
-                data = response.json()
-                speech = data.get('speech', '')
         
         # Allow providing expected directly or from JSON
-        if not expected:
-            expected = self.expected_results.get(element_id, None)
-            if not expected:
-                raise Exception(f"No expected result defined for element: {element_id}")
-        
-        result = {
-            "element_id": element_id,
-            "actual": speech,
-            "expected": expected,
-            "passed": expected in speech,
-            "timestamp": datetime.now().isoformat()
-        }
-        self.speech_log.append(result)
+        if not expected and element_id not in self.matcher:
+            raise Exception(f"No expected result defined for element: {element_id}")
         
-        if not result["passed"]:
-            print(f"Speech verification failed for {element_id}. Expected: '{expected}', Got: '{speech}'")
+        result = self.matcher.match(element_id, speech, expected or None)
+        result["timestamp"] = datetime.now().isoformat()
+        self._log_speech(result)
         
-        return result["passed"]
+        if not result["passed"] and fail_on_mismatch:
+            checks = "; ".join(f"{diff['check']} expected '{diff['expected']}'" for diff in result["diffs"])
+            raise Exception(f"Speech verification failed for {element_id}: {checks}, got '{speech}'")
+        
+        return result
         
     @keyword
+    @timed
     def press_key(self, key):
         """Press a key using NVDA."""
-        if self.use_direct_nvda and not self.use_mock:
-            # For direct NVDA, use NVDADirect if available
-            if NVDA_DIRECT_AVAILABLE and self.nvda:
-                self.nvda.send_keys(key)
+        return self._require_backend().press(key)
+    
+    @keyword
+    @timed
+    def start_speech_capture(self, timeout=5, name=None):
+        """Start capturing speech in the background and return a handle for ``Await Speech``.
+        
+        What the screen reader says from now on is waited for on a worker
+        thread while the next keywords, such as Browser's ``Click`` or ``Fill
+        Text``, run. The capture ends once speech has settled, or after
+        ``timeout`` seconds with the latest phrase. ``name`` sets the handle,
+        otherwise the captures are numbered.
+        """
+        backend = self._require_backend()
+        # Mark before returning, so speech caused by the next keyword is never missed
+        mark = backend.speech_mark()
+        if self.capture_pool is None:
+            self.capture_pool = ThreadPoolExecutor(max_workers=self.capture_workers,
+                                                   thread_name_prefix="speech-capture")
+        self.capture_count += 1
+        capture = name or f"capture-{self.capture_count}"
+        self.captures[capture] = self.capture_pool.submit(backend.capture_speech, mark, float(timeout))
+        self.last_capture = capture
+        return capture
+    
+    @keyword
+    @timed
+    def await_speech(self, capture=None, selector=None):
+        """Wait for a capture started with ``Start Speech Capture`` and return its speech.
+        
+        ``capture`` defaults to the capture started last. The speech is written
+        to the speech log, and filed under ``selector`` in the baseline store
+        when one is given.
+        """
+        if capture is None:
+            capture = self.last_capture
+        future = self.captures.pop(capture, None)
+        if future is None:
+            raise Exception(f"No speech capture '{capture}' is pending, call Start Speech Capture first")
+        speech = future.result()
+        
+        self._log_speech({
+            "selector": selector,
+            "capture": capture,
+            "timestamp": datetime.now().isoformat(),
+            "speech": speech
+        })
+        return speech
+    
+    @keyword
+    @timed
+    def crawl_focus_order(self, max_stops=200, key="Tab", timeout=5, identity_keyword=None,
+                          press_keyword=None):
+        """Tab through the page and capture the speech at every focus stop.
+        
+        Presses ``key`` until focus comes back to an element already visited
+        or ``max_stops`` is reached. Each stop is written to the speech log as
+        soon as it is captured and the stops are returned as dictionaries with
+        ``focus_stop``, ``selector`` and ``speech``.
+        
+        ``identity_keyword`` names a keyword returning something that
+        identifies the focused element, such as ``Get Focused Element
+        Selector``. Without it the backend's own notion of the focused element
+        is used where it has one; otherwise speech stands in for identity and
+        the crawl stops when the first stop's speech is heard again.
+        
+        ``press_keyword`` names a keyword that presses a key in the browser,
+        such as ``Press Key In Browser``; it is called with ``key`` whenever
+        the backend cannot move the browser's focus itself (``direct`` and
+        the mocks). Fails if focus does not move after the first press.
+        """
+        return list(self._crawl_focus_order(int(max_stops), key, timeout, identity_keyword, press_keyword))
+    
+    def _navigate(self, backend, key, timeout, press_keyword):
+        """Move focus with ``key`` and return the backend's navigation result"""
+        if not press_keyword or backend.moves_real_focus:
+            return backend.navigate(key, timeout)
+        # The browser gets the key; the screen reader announces the new focus
+        mark = backend.speech_mark()
+        BuiltIn().run_keyword(press_keyword, key)
+        if backend.simulated_focus:
+            # A mock has nothing to announce unless its own focus follows along
+            backend.press(key)
+        return {"speech": backend.wait_for_speech(mark, timeout)}
+    
+    def _crawl_focus_order(self, max_stops, key, timeout, identity_keyword, press_keyword=None):
+        """Yield one logged record per focus stop until focus cycles."""
+        backend = self._require_backend()
+        visited = set()
+        first_element = None
+        first_speech = None
+        
+        for stop in range(max_stops):
+            navigation = self._navigate(backend, key, timeout, press_keyword)
+            speech = navigation["speech"]
+            if identity_keyword:
+                element = BuiltIn().run_keyword(identity_keyword)
             else:
-                # Otherwise just log
-                print(f"Simulating key press: {key}")
-            return {"status": "key_pressed", "key": key}
-        else:
-            response = requests.get(f"{self.BRIDGE_URL}/press", params={"key": key})
+                element = navigation.get("focused")
+            
+            # Focus that never moves would end the crawl as a one-stop cycle
+            if stop == 1 and element is not None and element == first_element:
+                hint = "" if press_keyword else ", pass press_keyword to press keys in the browser"
+                raise Exception(f"Focus did not move from {element} when pressing {key} "
+                                f"with the {backend.name} backend{hint}")
+            
+            # Back at a visited element means the whole tab order has been seen
+            if element is not None:
+                if element in visited:
+                    return
+                visited.add(element)
+            elif stop > 0 and speech == first_speech:
+                return
+            if stop == 0:
+                first_element = element
+                first_speech = speech
+            
+            record = {
+                "focus_stop": stop,
+                "selector": element,
+                "timestamp": datetime.now().isoformat(),
+                "speech": speech
+            }
+            self._log_speech(record)
+            yield record
+        
+        print(f"Focus order crawl stopped after {max_stops} stops without returning to a visited element")
+    
+    def _require_backend(self):
+        if not self.backend:
+            raise Exception("NVDA is not initialized, call Initialize NVDA first")
+        return self.backend
+    
+    @keyword
+    @timed
+    def get_speech_sequence(self):
+        """Return the sequence number of the latest utterance received from the bridge."""
+        return self._require_speech_events().last_sequence
+    
+    @keyword
+    @timed
+    def get_speech_since(self, sequence=0, timeout=0):
+        """Return every utterance spoken after ``sequence``.
+        
+        Each utterance is a dictionary with ``seq``, ``timestamp`` and
+        ``speech``. With a ``timeout`` in seconds, waits for at least one new
+        utterance before returning. Requires ``stream_speech=True``.
+        """
+        events = self._require_speech_events()
+        if float(timeout) > 0:
+            return events.wait_for(sequence, timeout)
+        return events.since(sequence)
+    
+    def _require_speech_events(self):
+        if not self.speech_events:
+            raise Exception("Speech streaming is not enabled, import the library with "
+                            "stream_speech=True and use a bridge")
+        return self.speech_events
+    
+    @keyword
+    @timed
+    def reload_mock_responses(self):
+        """Reload the mock screen reader's response catalogues from disk.
+        
+        The mock bridge also reloads by itself when a catalogue file changes;
+        this keyword makes the reload immediate. Returns the number of exact,
+        prefix and pattern entries loaded.
+        """
+        backend = self._require_backend()
+        if isinstance(backend, InProcessMockBackend):
+            return backend.reload()
+        if isinstance(backend, BridgeBackend) and backend.mock:
+            response = backend.get("/reload")
             if response.status_code != 200:
-                raise Exception(f"Failed to press key: {response.text}")
-            return response.json()
+                raise Exception(f"Failed to reload mock responses: {response.text}")
+            return response.json()["catalogue"]
+        raise Exception(f"The {backend.name} backend has no mock responses to reload")
+    
+    @keyword
+    @timed
+    def get_latency_stats(self):
+        """Return timing statistics recorded so far.
         
+        Maps operation names to ``count``, ``mean_ms``, ``p50_ms``, ``p95_ms``,
+        ``p99_ms`` and ``max_ms``. Operations are ``keyword:<name>`` for
+        every library keyword, ``http:<path>`` for bridge round trips, and
+        ``server:<path>`` / ``transport:<path>`` splitting each round trip
+        into the bridge's own handling time and everything else.
+        """
+        return self.latency.summary()
+    
     @keyword
+    @timed
     def is_using_mock(self):
         """Return whether we're using mock mode."""
-        return self.use_mock
+        return self._resolve_backend_name() in ("mock", "inprocess")
         
     @keyword
+    @timed
     def is_using_direct_nvda(self):
         """Return whether we're using direct NVDA execution."""
-        return self.use_direct_nvda 
\ No newline at end of file
+        return self._resolve_backend_name() == "direct" 
\ No newline at end of file
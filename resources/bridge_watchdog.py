@@ -0,0 +1,89 @@
+"""
+Watchdog for the Node.js bridge process
+Drains the bridge's stdout and stderr on background threads, so the bridge
+never blocks on a full pipe, keeps the last lines of each for diagnostics and
+notices as soon as the process exits.
+"""
+
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger("BridgeWatchdog")
+
+
+class BridgeWatchdog:
+    """
+    Watches one bridge process
+
+    ``exited`` is set the moment the process ends; ``describe_exit`` gives
+    its exit code with the tail of what it wrote to stderr.
+    """
+
+    def __init__(self, process, name="bridge", tail_lines=200):
+        self.process = process
+        self.name = name
+        self.stdout_lines = deque(maxlen=int(tail_lines))
+        self.stderr_lines = deque(maxlen=int(tail_lines))
+        self.exited = threading.Event()
+        self._stopping = False
+        self._threads = []
+
+    def start(self):
+        """Start draining the pipes and waiting for the process on daemon threads"""
+        for stream, lines in ((self.process.stdout, self.stdout_lines),
+                              (self.process.stderr, self.stderr_lines)):
+            if stream is not None:
+                self._spawn(self._drain, stream, lines)
+        self._spawn(self._wait)
+        return self
+
+    def _spawn(self, target, *args):
+        thread = threading.Thread(target=target, args=args, name=f"{self.name}-watchdog", daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _drain(self, stream, lines):
+        try:
+            for raw_line in iter(stream.readline, b""):
+                lines.append(raw_line.decode(errors="replace").rstrip())
+        except (OSError, ValueError):
+            # The pipe was closed under us while the process was being stopped
+            pass
+
+    def _wait(self):
+        self.process.wait()
+        # Let the drain threads collect what the process wrote on its way out
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=1)
+        self.exited.set()
+        if self.process.returncode not in (0, None) and not self._stopping:
+            logger.warning(f"{self.name} {self.describe_exit()}")
+
+    def is_alive(self):
+        return not self.exited.is_set() and self.process.poll() is None
+
+    @property
+    def returncode(self):
+        return self.process.poll()
+
+    def stderr_tail(self, lines=20):
+        """Return the last ``lines`` lines the process wrote to stderr"""
+        return "\n".join(list(self.stderr_lines)[-int(lines):])
+
+    def describe_exit(self):
+        """Explain how the process ended, including the tail of its stderr"""
+        message = f"exited with code {self.returncode}"
+        stderr = self.stderr_tail()
+        return f"{message}: {stderr}" if stderr else message
+
+    def expect_exit(self):
+        """Note that the process is being stopped on purpose, so its exit is not reported"""
+        self._stopping = True
+
+    def stop(self, timeout=1):
+        """Wait briefly for the threads after the process has been stopped"""
+        self._stopping = True
+        for thread in self._threads:
+            thread.join(timeout=timeout)
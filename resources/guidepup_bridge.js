@@ -11,10 +11,408 @@ const nvda = guidepup.nvda;
 // Initialize NVDA instance
 let nvdaRunning = false;
 
+// Defaults for the speech settled wait (milliseconds)
+const DEFAULT_WAIT_TIMEOUT_MS = 5000;
+const DEFAULT_QUIET_PERIOD_MS = 200;
+const SPEECH_POLL_INTERVAL_MS = 25;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Speech event stream: every utterance gets a sequence number and is pushed
+// to /events subscribers, with recent ones kept for replay on reconnect
+const EVENT_BUFFER_SIZE = 1000;
+const EVENT_HEARTBEAT_MS = 15000;
+let eventSequence = 0;
+const recentEvents = [];
+const eventClients = new Set();
+
+function writeEvent(res, event) {
+    res.write(`id: ${event.seq}\nevent: speech\ndata: ${JSON.stringify(event)}\n\n`);
+}
+
+function publishUtterance(speech) {
+    eventSequence += 1;
+    const event = { seq: eventSequence, timestamp: new Date().toISOString(), speech };
+    recentEvents.push(event);
+    if (recentEvents.length > EVENT_BUFFER_SIZE) {
+        recentEvents.shift();
+    }
+    for (const client of eventClients) {
+        writeEvent(client, event);
+    }
+}
+
+// Serve /events as Server-Sent Events, replaying anything after `since`
+function openEventStream(req, res, since) {
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream; charset=utf-8',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive'
+    });
+    for (const event of recentEvents) {
+        if (event.seq > since) {
+            writeEvent(res, event);
+        }
+    }
+    eventClients.add(res);
+    ensureSpeechWatcher();
+    
+    // Comment lines keep idle connections from timing out
+    const heartbeat = setInterval(() => res.write(': heartbeat\n\n'), EVENT_HEARTBEAT_MS);
+    req.on('close', () => {
+        clearInterval(heartbeat);
+        eventClients.delete(res);
+        // Nobody is listening, stop reading NVDA's phrase log
+        if (eventClients.size === 0) {
+            stopSpeechWatcher();
+        }
+    });
+}
+
+// Watch NVDA's phrase log while it runs and someone is subscribed to
+// /events, and publish each new phrase. Phrases spoken while nobody listened
+// are published when the next subscriber arrives, so `since` replays them
+let publishedPhrases = 0;
+let speechWatcher = null;
+
+function ensureSpeechWatcher() {
+    if (nvdaRunning && eventClients.size > 0 && !speechWatcher) {
+        startSpeechWatcher();
+    }
+}
+
+function startSpeechWatcher() {
+    let checking = false;
+    speechWatcher = setInterval(async () => {
+        if (checking) {
+            return;
+        }
+        checking = true;
+        try {
+            // Read through the queue so commands against nvda stay strictly in order
+            const log = await commandQueue.enqueue('events', () => nvdaRunning ? nvda.spokenPhraseLog() : null);
+            if (!log) {
+                return;
+            }
+            if (log.length < publishedPhrases) {
+                // The log was cleared
+                publishedPhrases = 0;
+            }
+            for (const phrase of log.slice(publishedPhrases)) {
+                publishUtterance(phrase);
+            }
+            publishedPhrases = log.length;
+        } catch (e) {
+            console.error('Error reading spoken phrase log:', e);
+        } finally {
+            checking = false;
+        }
+    }, SPEECH_POLL_INTERVAL_MS);
+}
+
+function stopSpeechWatcher() {
+    if (speechWatcher) {
+        clearInterval(speechWatcher);
+        speechWatcher = null;
+    }
+}
+
+// Number of phrases NVDA has spoken so far, used to detect the next utterance
+async function spokenPhraseCount() {
+    const log = await nvda.spokenPhraseLog();
+    return log.length;
+}
+
+// Wait until NVDA has spoken something after `since` (if given) and the
+// speech has stopped changing for `quietMs`, or until `timeoutMs` elapses
+async function waitForSpeechSettled(since, timeoutMs, quietMs) {
+    const startedAt = Date.now();
+    let count = await spokenPhraseCount();
+    let speech = await nvda.lastSpokenPhrase();
+    let changedAt = startedAt;
+    
+    while (true) {
+        const now = Date.now();
+        const heardNew = since === null || count > since;
+        if (heardNew && now - changedAt >= quietMs) {
+            return { speech, settled: true, elapsedMs: now - startedAt };
+        }
+        if (now - startedAt >= timeoutMs) {
+            return { speech, settled: false, elapsedMs: now - startedAt };
+        }
+        
+        await sleep(SPEECH_POLL_INTERVAL_MS);
+        const currentCount = await spokenPhraseCount();
+        const currentSpeech = await nvda.lastSpokenPhrase();
+        if (currentCount !== count || currentSpeech !== speech) {
+            count = currentCount;
+            speech = currentSpeech;
+            changedAt = Date.now();
+        }
+    }
+}
+
+function requireRunning() {
+    if (!nvda || !nvdaRunning) {
+        throw new Error('NVDA not running');
+    }
+}
+
+// Screen reader commands, shared by the single-command routes and /batch.
+// Each takes the request parameters and resolves to the JSON response body.
+const commands = {
+    async start() {
+        if (!nvda) {
+            throw new Error('NVDA module not available in guidepup');
+        }
+        
+        // Start NVDA
+        if (!nvdaRunning) {
+            try {
+                await nvda.start();
+                nvdaRunning = true;
+                publishedPhrases = 0;
+                ensureSpeechWatcher();
+            } catch (e) {
+                throw new Error(`NVDA failed to start: ${e.message}`);
+            }
+        }
+        return { status: 'started' };
+    },
+    
+    async stop() {
+        // Stop NVDA
+        if (nvda && nvdaRunning) {
+            try {
+                stopSpeechWatcher();
+                await nvda.stop();
+                nvdaRunning = false;
+            } catch (e) {
+                console.error('Error stopping NVDA:', e);
+            }
+        }
+        return { status: 'stopped' };
+    },
+    
+    async reset() {
+        // Clear speech from the previous suite but keep NVDA running
+        if (nvda && nvdaRunning) {
+            await nvda.clearSpokenPhraseLog();
+            await nvda.clearItemTextLog();
+            publishedPhrases = 0;
+        }
+        return { status: 'reset' };
+    },
+    
+    async speak() {
+        // Get last spoken phrase
+        requireRunning();
+        
+        let speech = '';
+        let spokenCount;
+        try {
+            // The count lets a caller wait for whatever is spoken after this point
+            spokenCount = await spokenPhraseCount();
+            speech = await nvda.lastSpokenPhrase();
+        } catch (e) {
+            speech = `Error getting speech: ${e.message}`;
+        }
+        return { speech, spokenCount };
+    },
+    
+    async focus(params) {
+        // Focus is driven by the browser, so only acknowledge the selector
+        requireRunning();
+        if (!params.selector) {
+            throw new Error('Selector parameter required');
+        }
+        return { status: 'focused', selector: params.selector };
+    },
+    
+    async act() {
+        // Perform action
+        requireRunning();
+        
+        // Snapshot the phrase count so the caller can wait for the next utterance
+        let spokenCount;
+        try {
+            spokenCount = await spokenPhraseCount();
+            await nvda.act();
+        } catch (e) {
+            throw new Error(`Error performing action: ${e.message}`);
+        }
+        return { status: 'action_performed', spokenCount };
+    },
+    
+    async wait(params) {
+        // Wait for the next utterance and return once speech has settled
+        requireRunning();
+        
+        const since = params.since !== undefined && params.since !== null ? parseInt(params.since, 10) : null;
+        const timeoutMs = parseInt(params.timeout || DEFAULT_WAIT_TIMEOUT_MS, 10);
+        const quietMs = parseInt(params.quiet || DEFAULT_QUIET_PERIOD_MS, 10);
+        
+        try {
+            return await waitForSpeechSettled(since, timeoutMs, quietMs);
+        } catch (e) {
+            throw new Error(`Error waiting for speech: ${e.message}`);
+        }
+    },
+    
+    async press(params) {
+        // Press a key
+        requireRunning();
+        
+        const key = params.key;
+        if (!key) {
+            throw new Error('Key parameter required');
+        }
+        
+        // Snapshot the phrase count so the caller can wait for what the key makes NVDA say
+        let spokenCount;
+        try {
+            spokenCount = await spokenPhraseCount();
+            await nvda.press(key);
+        } catch (e) {
+            throw new Error(`Error pressing key: ${e.message}`);
+        }
+        return { status: 'key_pressed', key, spokenCount };
+    }
+};
+
+// Runs screen reader commands strictly one at a time in arrival order, so
+// pipelined or concurrent requests never interleave on the NVDA instance
+class CommandQueue {
+    constructor() {
+        this.tail = Promise.resolve();
+        this.depth = 0;
+        this.processed = 0;
+        this.stats = {};
+    }
+    
+    enqueue(name, task) {
+        const enqueuedAt = process.hrtime.bigint();
+        this.depth += 1;
+        
+        const run = this.tail.then(async () => {
+            const startedAt = process.hrtime.bigint();
+            try {
+                return await task();
+            } finally {
+                const finishedAt = process.hrtime.bigint();
+                this.depth -= 1;
+                this.processed += 1;
+                this.record(name, Number(startedAt - enqueuedAt) / 1e6, Number(finishedAt - startedAt) / 1e6);
+            }
+        });
+        // A failed command must not stop the ones queued behind it
+        this.tail = run.catch(() => {});
+        return run;
+    }
+    
+    record(name, waitMs, runMs) {
+        const stat = this.stats[name] || (this.stats[name] = {
+            count: 0, totalWaitMs: 0, totalRunMs: 0, maxRunMs: 0, lastRunMs: 0
+        });
+        stat.count += 1;
+        stat.totalWaitMs += waitMs;
+        stat.totalRunMs += runMs;
+        stat.maxRunMs = Math.max(stat.maxRunMs, runMs);
+        stat.lastRunMs = runMs;
+    }
+    
+    snapshot() {
+        const commands = {};
+        for (const [name, stat] of Object.entries(this.stats)) {
+            commands[name] = {
+                count: stat.count,
+                avgWaitMs: stat.totalWaitMs / stat.count,
+                avgRunMs: stat.totalRunMs / stat.count,
+                maxRunMs: stat.maxRunMs,
+                lastRunMs: stat.lastRunMs
+            };
+        }
+        return { depth: this.depth, processed: this.processed, commands };
+    }
+}
+
+const commandQueue = new CommandQueue();
+
+// Actions that may appear in a /batch request. `focus` is left out: focus is
+// driven by the browser, so a batched focus would only echo its selector and
+// every following act would announce the same element
+const BATCH_ACTIONS = ['act', 'press', 'speak', 'wait'];
+
+// Run a list of actions in order, capturing the speech after each step.
+// Processing stops at the first failing step, which carries an `error`.
+async function runBatch(actions) {
+    const results = [];
+    let lastSpokenCount = null;
+    
+    for (const step of actions) {
+        const action = step.action;
+        try {
+            if (action === 'focus') {
+                throw new Error('focus cannot be batched on the Guidepup bridge, focus elements in the browser');
+            }
+            if (!BATCH_ACTIONS.includes(action)) {
+                throw new Error(`Unsupported batch action: ${action}`);
+            }
+            
+            // A wait without `since` waits for the utterance of the preceding act
+            const params = { ...step };
+            if (action === 'wait' && params.since === undefined) {
+                params.since = lastSpokenCount;
+            }
+            
+            const result = await commands[action](params);
+            if (action === 'act') {
+                lastSpokenCount = result.spokenCount;
+            }
+            if (result.speech === undefined) {
+                result.speech = await nvda.lastSpokenPhrase();
+            }
+            results.push({ action, ...result });
+        } catch (e) {
+            results.push({ action, error: e.message });
+            return { results, completed: false };
+        }
+    }
+    return { results, completed: true };
+}
+
+// Read and parse a JSON request body
+function readJsonBody(req) {
+    return new Promise((resolve, reject) => {
+        let body = '';
+        req.on('data', chunk => { body += chunk; });
+        req.on('end', () => {
+            try {
+                resolve(body ? JSON.parse(body) : {});
+            } catch (e) {
+                reject(new Error(`Invalid JSON body: ${e.message}`));
+            }
+        });
+        req.on('error', reject);
+    });
+}
+
+// Send a JSON response with the server-side handling time as a Server-Timing header
+function sendJson(res, status, body) {
+    const elapsedMs = Number(process.hrtime.bigint() - res.startedAt) / 1e6;
+    res.writeHead(status, {
+        'Content-Type': 'application/json',
+        'Server-Timing': `app;dur=${elapsedMs.toFixed(3)}`
+    });
+    res.end(JSON.stringify(body));
+}
+
 // Create a simple HTTP server to provide an API for Python to interact with
 const server = createServer(async (req, res) => {
     const parsedUrl = url.parse(req.url, true);
     const pathname = parsedUrl.pathname;
+    const commandName = pathname.slice(1);
+    res.startedAt = process.hrtime.bigint();
     
     // Set CORS headers
     res.setHeader('Access-Control-Allow-Origin', '*');
@@ -30,110 +428,68 @@ const server = createServer(async (req, res) => {
     
     // Handle API requests
     try {
-        if (pathname === '/start') {
-            if (!nvda) {
-                throw new Error('NVDA module not available in guidepup');
+        if (pathname === '/batch') {
+            // Run a POSTed list of actions in a single round trip
+            if (req.method !== 'POST') {
+                sendJson(res, 405, { error: 'Use POST for /batch' });
+                return;
             }
             
-            // Start NVDA
-            if (!nvdaRunning) {
-                try {
-                    await nvda.start();
-                    nvdaRunning = true;
-                } catch (e) {
-                    throw new Error(`NVDA failed to start: ${e.message}`);
-                }
+            const body = await readJsonBody(req);
+            const actions = Array.isArray(body) ? body : body.actions;
+            if (!Array.isArray(actions)) {
+                throw new Error('Batch body must be a list of actions');
             }
+            requireRunning();
             
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'started' }));
-        } 
-        else if (pathname === '/stop') {
-            // Stop NVDA
-            if (nvda && nvdaRunning) {
-                try {
-                    await nvda.stop();
-                    nvdaRunning = false;
-                } catch (e) {
-                    console.error('Error stopping NVDA:', e);
-                }
-            }
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'stopped' }));
-        } 
-        else if (pathname === '/speak') {
-            // Get last spoken phrase
-            if (!nvda || !nvdaRunning) {
-                throw new Error('NVDA not running');
-            }
-            
-            let speech = '';
-            try {
-                speech = await nvda.lastSpokenPhrase();
-            } catch (e) {
-                speech = `Error getting speech: ${e.message}`;
-            }
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ speech }));
-        } 
-        else if (pathname === '/act') {
-            // Perform action
-            if (!nvda || !nvdaRunning) {
-                throw new Error('NVDA not running');
-            }
-            
-            try {
-                await nvda.act();
-            } catch (e) {
-                throw new Error(`Error performing action: ${e.message}`);
-            }
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'action_performed' }));
-        } 
-        else if (pathname === '/press') {
-            // Press a key
-            if (!nvda || !nvdaRunning) {
-                throw new Error('NVDA not running');
-            }
-            
-            const key = parsedUrl.query.key;
-            if (!key) {
-                throw new Error('Key parameter required');
-            }
-            
-            try {
-                await nvda.press(key);
-            } catch (e) {
-                throw new Error(`Error pressing key: ${e.message}`);
-            }
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'key_pressed', key }));
-        } 
+            // The whole batch is one queue entry so its steps run back to back
+            const result = await commandQueue.enqueue('batch', () => runBatch(actions));
+            sendJson(res, 200, result);
+        }
+        else if (pathname === '/events') {
+            // Stream utterances as they are spoken
+            const lastEventId = req.headers['last-event-id'];
+            const since = parseInt(parsedUrl.query.since || lastEventId || 0, 10);
+            openEventStream(req, res, since);
+        }
+        else if (pathname === '/exit') {
+            // Shut the bridge down, used to stop a long-lived daemon
+            await commandQueue.enqueue('stop', () => commands.stop());
+            sendJson(res, 200, { status: 'exiting' });
+            server.close();
+            setImmediate(() => process.exit(0));
+        }
+        else if (Object.prototype.hasOwnProperty.call(commands, commandName)) {
+            const result = await commandQueue.enqueue(commandName, () => commands[commandName](parsedUrl.query));
+            sendJson(res, 200, result);
+        }
+        else if (pathname === '/queue') {
+            // Queue depth and per-command latency
+            sendJson(res, 200, commandQueue.snapshot());
+        }
         else if (pathname === '/version') {
             // Get guidepup version info
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ 
+            sendJson(res, 200, { 
                 guidepup: guidepup.version || 'unknown',
                 modules: Object.keys(guidepup),
                 nvdaAvailable: !!nvda
-            }));
+            });
         }
         else {
-            res.writeHead(404, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ error: 'Not found' }));
+            sendJson(res, 404, { error: 'Not found' });
         }
     } catch (error) {
         console.error('Error handling request:', error);
-        res.writeHead(500, { 'Content-Type': 'application/json' });
-        res.end(JSON.stringify({ error: error.message }));
+        sendJson(res, 500, { error: error.message });
     }
 });
 
-const PORT = 3000;
+// Keep idle connections open so the Python client can reuse them
+server.keepAliveTimeout = 60000;
+server.headersTimeout = 65000;
+
+// Port comes from the command line or GUIDEPUP_BRIDGE_PORT so several bridges can run side by side
+const PORT = parseInt(process.argv[2] || process.env.GUIDEPUP_BRIDGE_PORT || 3000, 10);
 server.listen(PORT, () => {
     console.log(`Guidepup bridge running at http://localhost:${PORT}`);
     console.log(`NVDA module available: ${!!nvda}`);
@@ -0,0 +1,105 @@
+"""
+Latency recording for library keywords and bridge calls
+Operations are timed with a high-resolution clock and summarised as count,
+mean, p50/p95/p99 and max in milliseconds.
+"""
+
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+def percentile(sorted_samples, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+class LatencyRecorder:
+    """
+    Collects durations per operation name
+
+    Count, total and max are exact; percentiles are computed over the most
+    recent ``max_samples`` durations of each operation.
+    """
+
+    def __init__(self, max_samples=10000):
+        self.max_samples = int(max_samples)
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def record(self, operation, seconds):
+        """Record one duration in seconds"""
+        milliseconds = seconds * 1000.0
+        with self._lock:
+            stats = self._operations.get(operation)
+            if stats is None:
+                stats = self._operations[operation] = {
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "samples": deque(maxlen=self.max_samples)
+                }
+            stats["count"] += 1
+            stats["total_ms"] += milliseconds
+            stats["max_ms"] = max(stats["max_ms"], milliseconds)
+            stats["samples"].append(milliseconds)
+
+    @contextmanager
+    def measure(self, operation):
+        """Time the body of a ``with`` block as ``operation``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(operation, time.perf_counter() - started)
+
+    def summary(self):
+        """Return ``{operation: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}``"""
+        with self._lock:
+            snapshot = {name: (stats["count"], stats["total_ms"], stats["max_ms"], sorted(stats["samples"]))
+                        for name, stats in self._operations.items()}
+
+        summary = {}
+        for name in sorted(snapshot):
+            count, total_ms, max_ms, samples = snapshot[name]
+            summary[name] = {
+                "count": count,
+                "mean_ms": round(total_ms / count, 3),
+                "p50_ms": round(percentile(samples, 0.50), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+                "p99_ms": round(percentile(samples, 0.99), 3),
+                "max_ms": round(max_ms, 3)
+            }
+        return summary
+
+    def write(self, path):
+        """Write the summary to a JSON file"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self._lock:
+            self._operations.clear()
+
+
+def parse_server_timing(header):
+    """Return the total duration in milliseconds from a Server-Timing header, or None"""
+    if not header:
+        return None
+    total = None
+    for metric in header.split(","):
+        for param in metric.split(";")[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "dur":
+                try:
+                    total = (total or 0.0) + float(value)
+                except ValueError:
+                    pass
+    return total
@@ -0,0 +1,142 @@
+"""
+Response catalogues for the mock screen readers
+A catalogue is a JSON file that either maps selectors to speech, or has
+"exact", "prefix" and "patterns" sections:
+
+    {
+      "exact": {"#login": "button, Log in"},
+      "prefix": {"#product-": "link, product"},
+      "patterns": {"h[1-6]": "heading"}
+    }
+
+Lookups try the exact selector, then the longest matching prefix, then the
+first pattern matching the whole selector. The exact selectors, in catalogue
+order, double as the page's tab order. mock_nvda.js implements the same
+format and lookup order.
+"""
+
+import os
+import re
+import json
+
+DEFAULT_CATALOGUE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_responses.json")
+SECTIONS = ("exact", "prefix", "patterns")
+
+
+def catalogue_files(sources):
+    """Expand catalogue files and directories into a list of files, in order"""
+    files = []
+    for source in sources:
+        if os.path.isdir(source):
+            files.extend(os.path.join(source, name) for name in sorted(os.listdir(source))
+                         if name.endswith(".json"))
+        else:
+            files.append(source)
+    return files
+
+
+def sources_from_environment():
+    """Catalogue sources from MOCK_NVDA_CATALOGUES, or the default catalogue"""
+    value = os.environ.get("MOCK_NVDA_CATALOGUES")
+    if not value:
+        return [DEFAULT_CATALOGUE]
+    return [source for source in value.split(os.pathsep) if source]
+
+
+class MockCatalogue:
+    """
+    Indexed selector to speech lookup built from catalogue files
+
+    Call ``reload_if_changed`` to pick up edited files without restarting.
+    """
+
+    def __init__(self, sources=None, cache_size=10000):
+        self.sources = list(sources or sources_from_environment())
+        self.cache_size = int(cache_size)
+        self.reload()
+
+    def reload(self):
+        """Rebuild the index from disk; the old index stays in place on errors"""
+        files = catalogue_files(self.sources)
+        exact = {}
+        prefixes = {}
+        patterns = []
+        for path in files:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            sectioned = any(isinstance(data.get(section), dict) for section in SECTIONS)
+            exact.update(data.get("exact", {}) if sectioned else data)
+            if sectioned:
+                prefixes.update(data.get("prefix", {}))
+                patterns.extend((re.compile(pattern), speech)
+                                for pattern, speech in data.get("patterns", {}).items())
+
+        self.files = files
+        self._mtimes = self._current_mtimes()
+        self._exact = exact
+        self.tab_order = list(exact)
+        self._tab_position = {selector: position for position, selector in enumerate(self.tab_order)}
+        self._prefixes = prefixes
+        self._prefix_lengths = sorted({len(prefix) for prefix in prefixes}, reverse=True)
+        self._patterns = patterns
+        self._cache = {}
+        return self.summary()
+
+    def _current_mtimes(self):
+        mtimes = {}
+        for path in list(self.sources) + catalogue_files(self.sources):
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def reload_if_changed(self):
+        """Reload when a catalogue file or directory changed; return True if it did"""
+        if self._current_mtimes() == self._mtimes:
+            return False
+        self.reload()
+        return True
+
+    def lookup(self, selector):
+        """Return the speech for a selector, or None if nothing matches"""
+        speech = self._exact.get(selector)
+        if speech is not None:
+            return speech
+        if selector in self._cache:
+            return self._cache[selector]
+
+        for length in self._prefix_lengths:
+            if length <= len(selector):
+                speech = self._prefixes.get(selector[:length])
+                if speech is not None:
+                    break
+        if speech is None:
+            speech = next((speech for pattern, speech in self._patterns
+                           if pattern.fullmatch(selector)), None)
+
+        # Remember prefix and pattern results so repeated selectors stay constant-time
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[selector] = speech
+        return speech
+
+    def next_in_tab_order(self, selector, step=1):
+        """Selector that Tab (step 1) or Shift+Tab (step -1) moves focus to, wrapping around"""
+        if not self.tab_order:
+            raise Exception("No focusable elements in the response catalogue")
+        current = self._tab_position.get(selector)
+        if current is None:
+            return self.tab_order[0 if step > 0 else -1]
+        return self.tab_order[(current + step) % len(self.tab_order)]
+
+    def summary(self):
+        return {
+            "files": self.files,
+            "exact": len(self._exact),
+            "prefix": len(self._prefixes),
+            "patterns": len(self._patterns)
+        }
+
+    def __len__(self):
+        return len(self._exact) + len(self._prefixes) + len(self._patterns)
@@ -1,26 +1,445 @@
 // Mock NVDA implementation for testing purposes
 const { createServer } = require('http');
 const url = require('url');
+const fs = require('fs');
+const path = require('path');
 
-// Simulated speech responses for different elements
-const mockResponses = {
-    'input[type="text"]': 'edit field, username',
-    'input[type="password"]': 'password edit, secure text',
-    'button[type="submit"]': 'submit button, login',
-    'h1': 'heading level 1, Welcome to LähiTapiola',
-    'input[type="checkbox"]': 'checkbox not checked, remember me',
-    'a': 'link, forgot password',
-    'nav': 'navigation region'
-};
+// Simulated speech comes from response catalogues: JSON files either mapping
+// selectors to speech, or with "exact", "prefix" and "patterns" sections.
+// MOCK_NVDA_CATALOGUES lists catalogue files or directories of them, separated
+// like PATH; later files override earlier ones. The format and lookup order
+// are shared with the in-process Python mock (mock_catalogue.py).
+const DEFAULT_CATALOGUE = path.join(__dirname, 'mock_responses.json');
+const CATALOGUE_SOURCES = (process.env.MOCK_NVDA_CATALOGUES || DEFAULT_CATALOGUE)
+    .split(path.delimiter)
+    .filter(Boolean);
+const RELOAD_DEBOUNCE_MS = 100;
+const LOOKUP_CACHE_SIZE = 10000;
+
+// Expand the sources into catalogue files, directories contributing their *.json files
+function catalogueFiles() {
+    const files = [];
+    for (const source of CATALOGUE_SOURCES) {
+        if (fs.statSync(source).isDirectory()) {
+            for (const name of fs.readdirSync(source).sort()) {
+                if (name.endsWith('.json')) {
+                    files.push(path.join(source, name));
+                }
+            }
+        } else {
+            files.push(source);
+        }
+    }
+    return files;
+}
+
+// Build the lookup index: a Map of exact selectors, a Map of prefixes with the
+// distinct prefix lengths (longest first) and a list of anchored patterns.
+// Exact selectors, in catalogue order, are also the page's tab order.
+function buildCatalogue(files) {
+    const exact = new Map();
+    const prefixes = new Map();
+    const patterns = [];
+    
+    for (const file of files) {
+        const data = JSON.parse(fs.readFileSync(file, 'utf8'));
+        const sectioned = ['exact', 'prefix', 'patterns'].some(key => typeof data[key] === 'object');
+        for (const [selector, speech] of Object.entries(sectioned ? data.exact || {} : data)) {
+            exact.set(selector, speech);
+        }
+        if (!sectioned) {
+            continue;
+        }
+        for (const [prefix, speech] of Object.entries(data.prefix || {})) {
+            prefixes.set(prefix, speech);
+        }
+        for (const [pattern, speech] of Object.entries(data.patterns || {})) {
+            patterns.push({ regex: new RegExp(`^(?:${pattern})$`), speech });
+        }
+    }
+    
+    const prefixLengths = [...new Set([...prefixes.keys()].map(prefix => prefix.length))]
+        .sort((a, b) => b - a);
+    const tabOrder = [...exact.keys()];
+    const tabPosition = new Map(tabOrder.map((selector, position) => [selector, position]));
+    return { files, exact, tabOrder, tabPosition, prefixes, prefixLengths, patterns, cache: new Map() };
+}
+
+// Exact match first, then the longest matching prefix, then the first matching pattern
+function lookupSpeech(selector) {
+    const index = catalogue;
+    const exact = index.exact.get(selector);
+    if (exact !== undefined) {
+        return exact;
+    }
+    if (index.cache.has(selector)) {
+        return index.cache.get(selector);
+    }
+    
+    let speech;
+    for (const length of index.prefixLengths) {
+        if (length <= selector.length) {
+            speech = index.prefixes.get(selector.slice(0, length));
+            if (speech !== undefined) {
+                break;
+            }
+        }
+    }
+    if (speech === undefined) {
+        const match = index.patterns.find(entry => entry.regex.test(selector));
+        speech = match ? match.speech : null;
+    }
+    
+    // Remember prefix and pattern results so repeated selectors stay constant-time
+    if (index.cache.size >= LOOKUP_CACHE_SIZE) {
+        index.cache.clear();
+    }
+    index.cache.set(selector, speech);
+    return speech;
+}
+
+function catalogueSummary() {
+    return {
+        files: catalogue.files,
+        exact: catalogue.exact.size,
+        prefix: catalogue.prefixes.size,
+        patterns: catalogue.patterns.length
+    };
+}
+
+let catalogue = buildCatalogue(catalogueFiles());
+
+// Rebuild the index from disk, keeping the current one if a catalogue is broken
+function reloadCatalogue() {
+    try {
+        catalogue = buildCatalogue(catalogueFiles());
+        console.log(`Response catalogue reloaded: ${catalogue.exact.size} exact, ` +
+                    `${catalogue.prefixes.size} prefix, ${catalogue.patterns.length} pattern entries`);
+    } catch (e) {
+        console.error(`Keeping previous response catalogue, reload failed: ${e.message}`);
+        throw e;
+    }
+    return catalogueSummary();
+}
+
+// Reload automatically when a catalogue changes, coalescing bursts of events.
+// A catalogue file is watched through its directory: editors save by writing a
+// temporary file and renaming it over the original, and a watch on the file
+// itself would stay on the replaced inode after the first such save.
+let reloadTimer = null;
+for (const source of CATALOGUE_SOURCES) {
+    try {
+        const isDirectory = fs.statSync(source).isDirectory();
+        const watched = isDirectory ? source : path.dirname(path.resolve(source));
+        const fileName = isDirectory ? null : path.basename(source);
+        fs.watch(watched, { persistent: false }, (eventType, changed) => {
+            // Some platforms do not report the name, reload to be safe then
+            if (changed) {
+                const name = changed.toString();
+                if (fileName ? name !== fileName : !name.endsWith('.json')) {
+                    return;
+                }
+            }
+            clearTimeout(reloadTimer);
+            reloadTimer = setTimeout(() => {
+                try {
+                    reloadCatalogue();
+                } catch (e) {
+                    // Already reported, the next change or /reload will retry
+                }
+            }, RELOAD_DEBOUNCE_MS);
+        });
+    } catch (e) {
+        console.error(`Cannot watch ${source} for changes: ${e.message}`);
+    }
+}
 
 // Keep track of the last focused element
 let lastFocusedElement = null;
 let nvdaRunning = false;
 
+// Count of simulated utterances and when the last one was spoken
+let spokenCount = 0;
+let lastSpokenAt = Date.now();
+
+// Defaults for the speech settled wait (milliseconds)
+const DEFAULT_WAIT_TIMEOUT_MS = 5000;
+const DEFAULT_QUIET_PERIOD_MS = 200;
+const SPEECH_POLL_INTERVAL_MS = 25;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
+// Artificial screen reader latency for benchmarking: each announcement is
+// delayed by MOCK_NVDA_LATENCY_MS plus up to MOCK_NVDA_JITTER_MS at random
+const SPEECH_LATENCY_MS = parseFloat(process.env.MOCK_NVDA_LATENCY_MS || 0);
+const SPEECH_JITTER_MS = parseFloat(process.env.MOCK_NVDA_JITTER_MS || 0);
+
+function speechDelay() {
+    return SPEECH_LATENCY_MS + Math.random() * SPEECH_JITTER_MS;
+}
+
+// Speech event stream: every utterance gets a sequence number and is pushed
+// to /events subscribers, with recent ones kept for replay on reconnect
+const EVENT_BUFFER_SIZE = 1000;
+const EVENT_HEARTBEAT_MS = 15000;
+let eventSequence = 0;
+const recentEvents = [];
+const eventClients = new Set();
+
+function writeEvent(res, event) {
+    res.write(`id: ${event.seq}\nevent: speech\ndata: ${JSON.stringify(event)}\n\n`);
+}
+
+function publishUtterance(speech) {
+    eventSequence += 1;
+    const event = { seq: eventSequence, timestamp: new Date().toISOString(), speech };
+    recentEvents.push(event);
+    if (recentEvents.length > EVENT_BUFFER_SIZE) {
+        recentEvents.shift();
+    }
+    for (const client of eventClients) {
+        writeEvent(client, event);
+    }
+}
+
+// Serve /events as Server-Sent Events, replaying anything after `since`
+function openEventStream(req, res, since) {
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream; charset=utf-8',
+        'Cache-Control': 'no-cache',
+        'Connection': 'keep-alive'
+    });
+    for (const event of recentEvents) {
+        if (event.seq > since) {
+            writeEvent(res, event);
+        }
+    }
+    eventClients.add(res);
+    
+    // Comment lines keep idle connections from timing out
+    const heartbeat = setInterval(() => res.write(': heartbeat\n\n'), EVENT_HEARTBEAT_MS);
+    req.on('close', () => {
+        clearInterval(heartbeat);
+        eventClients.delete(res);
+    });
+}
+
+// Speech for the currently focused element
+function currentSpeech() {
+    if (lastFocusedElement) {
+        const speech = lookupSpeech(lastFocusedElement);
+        if (speech) {
+            return speech;
+        }
+    }
+    return 'No element focused';
+}
+
+// Record that the mock screen reader announced something
+function announce() {
+    spokenCount += 1;
+    lastSpokenAt = Date.now();
+    publishUtterance(currentSpeech());
+}
+
+// Wait until something has been spoken after `since` (if given) and nothing
+// new has been spoken for `quietMs`, or until `timeoutMs` elapses
+async function waitForSpeechSettled(since, timeoutMs, quietMs) {
+    const startedAt = Date.now();
+    
+    while (true) {
+        const now = Date.now();
+        const heardNew = since === null || spokenCount > since;
+        if (heardNew && now - lastSpokenAt >= quietMs) {
+            return { speech: currentSpeech(), settled: true, elapsedMs: now - startedAt };
+        }
+        if (now - startedAt >= timeoutMs) {
+            return { speech: currentSpeech(), settled: false, elapsedMs: now - startedAt };
+        }
+        await sleep(SPEECH_POLL_INTERVAL_MS);
+    }
+}
+
+// Keys that move focus, and in which direction
+const TAB_KEYS = { 'Tab': 1, 'Shift+Tab': -1 };
+
+function requireRunning() {
+    if (!nvdaRunning) {
+        throw new Error('Mock NVDA not running');
+    }
+}
+
+// Mock screen reader commands, shared by the single-command routes and /batch.
+// Each takes the request parameters and resolves to the JSON response body.
+const commands = {
+    async start() {
+        // Start mock NVDA
+        nvdaRunning = true;
+        console.log('Mock NVDA started');
+        return { status: 'started' };
+    },
+    
+    async stop() {
+        // Stop mock NVDA
+        nvdaRunning = false;
+        console.log('Mock NVDA stopped');
+        return { status: 'stopped' };
+    },
+    
+    async reset() {
+        // Forget the previous suite's focus and speech but keep running
+        lastFocusedElement = null;
+        spokenCount = 0;
+        lastSpokenAt = Date.now();
+        return { status: 'reset' };
+    },
+    
+    async speak() {
+        // Get last spoken phrase
+        requireRunning();
+        return { speech: currentSpeech(), spokenCount };
+    },
+    
+    async focus(params) {
+        // Focus on a specific element
+        requireRunning();
+        
+        const selector = params.selector;
+        if (!selector) {
+            throw new Error('Selector parameter required');
+        }
+        
+        lastFocusedElement = selector;
+        await sleep(speechDelay());
+        announce();
+        console.log(`Element focused: ${selector}`);
+        return { status: 'focused', selector };
+    },
+    
+    async act() {
+        // Act on the current element (simulate pressing Enter)
+        requireRunning();
+        
+        // Acting re-announces the current element
+        const countBefore = spokenCount;
+        await sleep(speechDelay());
+        announce();
+        console.log('Action performed on current element');
+        return { status: 'action_performed', spokenCount: countBefore };
+    },
+    
+    async wait(params) {
+        // Wait for the next utterance and return once speech has settled
+        requireRunning();
+        
+        const since = params.since !== undefined && params.since !== null ? parseInt(params.since, 10) : null;
+        const timeoutMs = parseInt(params.timeout || DEFAULT_WAIT_TIMEOUT_MS, 10);
+        const quietMs = parseInt(params.quiet || DEFAULT_QUIET_PERIOD_MS, 10);
+        
+        return await waitForSpeechSettled(since, timeoutMs, quietMs);
+    },
+    
+    async press(params) {
+        // Press a key
+        requireRunning();
+        
+        const key = params.key;
+        if (!key) {
+            throw new Error('Key parameter required');
+        }
+        
+        const countBefore = spokenCount;
+        console.log(`Key pressed: ${key}`);
+        
+        // Tab and Shift+Tab move focus through the catalogue's elements, wrapping around
+        const step = TAB_KEYS[key];
+        if (step !== undefined) {
+            const order = catalogue.tabOrder;
+            if (order.length === 0) {
+                throw new Error('No focusable elements in the response catalogue');
+            }
+            const current = catalogue.tabPosition.get(lastFocusedElement);
+            const next = current === undefined ? (step > 0 ? 0 : order.length - 1)
+                                               : (current + step + order.length) % order.length;
+            lastFocusedElement = order[next];
+            await sleep(speechDelay());
+            announce();
+            return { status: 'key_pressed', key, spokenCount: countBefore, focused: lastFocusedElement };
+        }
+        return { status: 'key_pressed', key, spokenCount: countBefore };
+    }
+};
+
+// Actions that may appear in a /batch request
+const BATCH_ACTIONS = ['focus', 'act', 'press', 'speak', 'wait'];
+
+// Run a list of actions in order, capturing the speech after each step.
+// Processing stops at the first failing step, which carries an `error`.
+async function runBatch(actions) {
+    const results = [];
+    let lastSpokenCount = null;
+    
+    for (const step of actions) {
+        const action = step.action;
+        try {
+            if (!BATCH_ACTIONS.includes(action)) {
+                throw new Error(`Unsupported batch action: ${action}`);
+            }
+            
+            // A wait without `since` waits for the utterance of the preceding act
+            const params = { ...step };
+            if (action === 'wait' && params.since === undefined) {
+                params.since = lastSpokenCount;
+            }
+            
+            const result = await commands[action](params);
+            if (action === 'act') {
+                lastSpokenCount = result.spokenCount;
+            }
+            if (result.speech === undefined) {
+                result.speech = currentSpeech();
+            }
+            results.push({ action, ...result });
+        } catch (e) {
+            results.push({ action, error: e.message });
+            return { results, completed: false };
+        }
+    }
+    return { results, completed: true };
+}
+
+// Read and parse a JSON request body
+function readJsonBody(req) {
+    return new Promise((resolve, reject) => {
+        let body = '';
+        req.on('data', chunk => { body += chunk; });
+        req.on('end', () => {
+            try {
+                resolve(body ? JSON.parse(body) : {});
+            } catch (e) {
+                reject(new Error(`Invalid JSON body: ${e.message}`));
+            }
+        });
+        req.on('error', reject);
+    });
+}
+
+// Send a JSON response with the server-side handling time as a Server-Timing header
+function sendJson(res, status, body) {
+    const elapsedMs = Number(process.hrtime.bigint() - res.startedAt) / 1e6;
+    res.writeHead(status, {
+        'Content-Type': 'application/json',
+        'Server-Timing': `app;dur=${elapsedMs.toFixed(3)}`
+    });
+    res.end(JSON.stringify(body));
+}
+
 // Create a simple HTTP server to provide a mock NVDA API
 const server = createServer(async (req, res) => {
     const parsedUrl = url.parse(req.url, true);
     const pathname = parsedUrl.pathname;
+    const commandName = pathname.slice(1);
+    res.startedAt = process.hrtime.bigint();
     
     // Set CORS headers
     res.setHeader('Access-Control-Allow-Origin', '*');
@@ -36,100 +455,67 @@ const server = createServer(async (req, res) => {
     
     // Handle API requests
     try {
-        if (pathname === '/start') {
-            // Start mock NVDA
-            nvdaRunning = true;
-            console.log('Mock NVDA started');
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'started' }));
-        } 
-        else if (pathname === '/stop') {
-            // Stop mock NVDA
-            nvdaRunning = false;
-            console.log('Mock NVDA stopped');
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'stopped' }));
-        } 
-        else if (pathname === '/speak') {
-            // Get last spoken phrase
-            if (!nvdaRunning) {
-                throw new Error('Mock NVDA not running');
-            }
-            
-            let speech = 'No element focused';
-            if (lastFocusedElement && mockResponses[lastFocusedElement]) {
-                speech = mockResponses[lastFocusedElement];
+        if (pathname === '/batch') {
+            // Run a POSTed list of actions in a single round trip
+            if (req.method !== 'POST') {
+                sendJson(res, 405, { error: 'Use POST for /batch' });
+                return;
             }
             
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ speech }));
-        } 
-        else if (pathname === '/focus') {
-            // Focus on a specific element
-            if (!nvdaRunning) {
-                throw new Error('Mock NVDA not running');
+            const body = await readJsonBody(req);
+            const actions = Array.isArray(body) ? body : body.actions;
+            if (!Array.isArray(actions)) {
+                throw new Error('Batch body must be a list of actions');
             }
+            requireRunning();
             
-            const selector = parsedUrl.query.selector;
-            if (!selector) {
-                throw new Error('Selector parameter required');
-            }
-            
-            lastFocusedElement = selector;
-            console.log(`Element focused: ${selector}`);
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'focused', selector }));
+            const result = await runBatch(actions);
+            sendJson(res, 200, result);
+        }
+        else if (pathname === '/events') {
+            // Stream utterances as they are spoken
+            const lastEventId = req.headers['last-event-id'];
+            const since = parseInt(parsedUrl.query.since || lastEventId || 0, 10);
+            openEventStream(req, res, since);
+        }
+        else if (pathname === '/reload') {
+            // Reload the response catalogues without restarting
+            sendJson(res, 200, { status: 'reloaded', catalogue: reloadCatalogue() });
+        }
+        else if (pathname === '/exit') {
+            // Shut the bridge down, used to stop a long-lived daemon
+            await commands.stop();
+            sendJson(res, 200, { status: 'exiting' });
+            server.close();
+            setImmediate(() => process.exit(0));
+        }
+        else if (Object.prototype.hasOwnProperty.call(commands, commandName)) {
+            const result = await commands[commandName](parsedUrl.query);
+            sendJson(res, 200, result);
         }
-        else if (pathname === '/act') {
-            // Act on the current element (simulate pressing Enter)
-            if (!nvdaRunning) {
-                throw new Error('Mock NVDA not running');
-            }
-            
-            console.log('Action performed on current element');
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'action_performed' }));
-        } 
-        else if (pathname === '/press') {
-            // Press a key
-            if (!nvdaRunning) {
-                throw new Error('Mock NVDA not running');
-            }
-            
-            const key = parsedUrl.query.key;
-            if (!key) {
-                throw new Error('Key parameter required');
-            }
-            
-            console.log(`Key pressed: ${key}`);
-            
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ status: 'key_pressed', key }));
-        } 
         else if (pathname === '/version') {
             // Get version info
-            res.writeHead(200, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ 
+            sendJson(res, 200, { 
                 version: 'mock-nvda-1.0.0',
-                running: nvdaRunning
-            }));
+                running: nvdaRunning,
+                catalogue: catalogueSummary()
+            });
         }
         else {
-            res.writeHead(404, { 'Content-Type': 'application/json' });
-            res.end(JSON.stringify({ error: 'Not found' }));
+            sendJson(res, 404, { error: 'Not found' });
         }
     } catch (error) {
         console.error('Error handling request:', error);
-        res.writeHead(500, { 'Content-Type': 'application/json' });
-        res.end(JSON.stringify({ error: error.message }));
+        sendJson(res, 500, { error: error.message });
     }
 });
 
-const PORT = 3000;
+// Keep idle connections open so the Python client can reuse them
+server.keepAliveTimeout = 60000;
+server.headersTimeout = 65000;
+
+// Port comes from the command line or GUIDEPUP_BRIDGE_PORT so several bridges can run side by side
+const PORT = parseInt(process.argv[2] || process.env.GUIDEPUP_BRIDGE_PORT || 3000, 10);
 server.listen(PORT, () => {
     console.log(`Mock NVDA bridge running at http://localhost:${PORT}`);
 }); 
\ No newline at end of file
@@ -0,0 +1,762 @@
+"""
+Screen reader backends for GuidepupLibrary
+Each backend drives the screen reader in one particular way behind the same
+small interface, so the library's keywords do not need to know which one is
+in use:
+
+    bridge     NVDA through the Node.js Guidepup bridge (guidepup_bridge.js)
+    mock       the Node.js mock bridge (mock_nvda.js)
+    direct     NVDA started directly, via NVDADirect when available
+    inprocess  a mock answered in Python, without Node.js or HTTP
+"""
+
+import os
+import sys
+import time
+import socket
+import functools
+import threading
+import subprocess
+from abc import ABC, abstractmethod
+
+import requests
+
+from latency_stats import LatencyRecorder, parse_server_timing
+from mock_catalogue import MockCatalogue
+from bridge_watchdog import BridgeWatchdog
+from process_utils import (popen_group, stop_process_group, record_pid, forget_pid, reap_recorded,
+                           recorded_pid, is_running, wait_for_exit)
+
+# Try to import the NVDADirect module
+try:
+    from nvda_direct import NVDADirect
+    NVDA_DIRECT_AVAILABLE = True
+except ImportError:
+    NVDA_DIRECT_AVAILABLE = False
+    print("NVDADirect module not available. Direct NVDA control will be limited.")
+
+RESOURCES_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class NVDABackend(ABC):
+    """
+    Interface shared by all screen reader backends
+
+    Subclasses must implement start, stop, focus, speak and press; the
+    other methods have defaults built on those.
+    """
+
+    name = None
+    latency = None
+    # Whether pressing a key through the backend moves focus in the browser
+    moves_real_focus = False
+    # Whether the backend keeps a simulated focus of its own instead of following the browser
+    simulated_focus = False
+
+    @abstractmethod
+    def start(self):
+        """Start the screen reader"""
+
+    @abstractmethod
+    def stop(self):
+        """Stop the screen reader"""
+
+    @abstractmethod
+    def focus(self, selector, timeout=5):
+        """Focus an element and return the speech it produces once settled"""
+
+    @abstractmethod
+    def speak(self):
+        """Return the last spoken phrase, or None if speech cannot be read"""
+
+    @abstractmethod
+    def press(self, key):
+        """Press a key and return the backend's acknowledgement"""
+
+    def navigate(self, key, timeout=5):
+        """
+        Press a key that moves focus and return the speech for the new focus
+
+        Returns a dictionary with ``speech`` and, when the backend knows which
+        element received focus, ``focused``.
+        """
+        self.press(key)
+        return {"speech": self.speak()}
+
+    def capture_many(self, selectors, timeout=5):
+        """Focus each selector in turn, returning dictionaries of selector and speech"""
+        return [{"selector": selector, "speech": self.focus(selector, timeout)}
+                for selector in selectors]
+
+    def speech_is_simulated(self):
+        """Return True if speech is made up rather than heard from a screen reader or mock"""
+        return False
+
+    def speech_mark(self):
+        """Return a marker of the speech heard so far, or None if the backend cannot tell"""
+        return None
+
+    def wait_for_speech(self, since=None, timeout=5):
+        """
+        Wait until speech heard after the ``since`` marker has settled and return it
+
+        May be called from a worker thread while other calls are made.
+        Backends that cannot wait return the last spoken phrase.
+        """
+        return self.speak()
+
+    def capture_speech(self, since=None, timeout=5):
+        """
+        Like wait_for_speech, for a capture running alongside other calls
+
+        Backends whose waits hold up other calls override this to wait
+        without doing so.
+        """
+        return self.wait_for_speech(since, timeout)
+
+
+class BridgeError(requests.exceptions.RequestException):
+    """The bridge died, stopped answering, or a call to it failed"""
+
+
+def retry_after_restart(operation):
+    """Restart a failed bridge and retry the operation once, if the backend allows it."""
+    @functools.wraps(operation)
+    def wrapper(self, *args, **kwargs):
+        # Operations called from within another one leave recovery to the outer one
+        if not self.restart_on_failure or self._recovering:
+            return operation(self, *args, **kwargs)
+        self._recovering = True
+        try:
+            try:
+                return operation(self, *args, **kwargs)
+            except BridgeError as e:
+                print(f"{e}; restarting the bridge and retrying {operation.__name__} once")
+                self.restart()
+                return operation(self, *args, **kwargs)
+        finally:
+            self._recovering = False
+    return wrapper
+
+
+class BridgeBackend(NVDABackend):
+    """
+    Drives a Node.js bridge (real or mock) over HTTP
+
+    With ``reuse`` the bridge is started as a detached daemon, or attached to
+    if one is already answering, and is reset rather than killed on stop.
+
+    Every call has a deadline: the read timeout from ``operation_timeouts``
+    for its path (``timeout`` otherwise), cut short by the suite ``deadline``
+    (a time.monotonic() value) when one is set. Failures are reported with
+    the bridge's exit code and stderr when it has died; with
+    ``restart_on_failure`` the bridge is restarted and the keyword-level
+    operation retried once.
+    """
+
+    # Teardown calls are never cut short by the suite budget
+    TEARDOWN_PATHS = ("/stop", "/reset", "/exit")
+
+    # Seconds between the /speak polls of a background speech capture
+    CAPTURE_POLL_INTERVAL = 0.05
+    # Name the capture polls are timed under
+    CAPTURE_OPERATION = "/speak(capture)"
+    # Read timeouts in seconds for calls that should answer quickly; /start
+    # gets the startup timeout, /wait and /batch are sized from their own timeouts
+    OPERATION_TIMEOUTS = {
+        "/version": 2,
+        "/reset": 10,
+        "/stop": 15,
+        "/act": 10,
+        "/focus": 10,
+        "/press": 10,
+        "/speak": 10,
+        "/reload": 10
+    }
+
+    def __init__(self, session, mock=False, port=3000, reuse=False, startup_timeout=30,
+                 timeout=(2, 30), quiet_period=0.2, latency=None, operation_timeouts=None,
+                 restart_on_failure=False):
+        self.name = "mock" if mock else "bridge"
+        # NVDA sends real keystrokes to the browser, the mock only moves its own focus
+        self.moves_real_focus = not mock
+        self.simulated_focus = mock
+        self.latency = latency or LatencyRecorder()
+        self.session = session
+        self.mock = mock
+        self.port = int(port)
+        self.url = f"http://localhost:{self.port}"
+        self.reuse = reuse
+        self.startup_timeout = float(startup_timeout)
+        self.timeout = timeout
+        self.quiet_period = quiet_period
+        self.operation_timeouts = dict(self.OPERATION_TIMEOUTS, **{"/start": self.startup_timeout})
+        self.operation_timeouts.update(operation_timeouts or {})
+        self.restart_on_failure = restart_on_failure
+        self.deadline = None
+        self.bridge_process = None
+        self.watchdog = None
+        self._recovering = False
+
+    def start(self):
+        if self.reuse and self.is_healthy():
+            # Attach to the running daemon and clear what the last suite left behind
+            print(f"Reusing bridge daemon at {self.url}")
+            response = self.get("/reset")
+            if response.status_code != 200:
+                raise Exception(f"Failed to reset bridge: {response.text}")
+        else:
+            if self.reuse:
+                # A daemon that holds the port without answering is left over from a crashed run
+                reap_recorded(self._pid_name())
+            with self.latency.measure("startup:bridge"):
+                self._start_bridge()
+
+        # Start NVDA through the bridge (a no-op if the daemon already has it running)
+        response = self.get("/start")
+        if response.status_code != 200:
+            raise Exception(f"Failed to start NVDA: {response.text}")
+
+    def stop(self):
+        if self.reuse:
+            # Leave the daemon and NVDA running for the next suite
+            self.get("/reset")
+            self.bridge_process = None
+            return
+
+        # Stop NVDA through the bridge, unless the bridge is already gone
+        try:
+            if self.watchdog is None or self.watchdog.is_alive():
+                self.get("/stop")
+        finally:
+            self._stop_process()
+
+    def _stop_process(self, graceful=True):
+        """Stop the bridge process we started, with its process group, and stop watching it"""
+        if self.watchdog:
+            self.watchdog.expect_exit()
+        if self.bridge_process:
+            # Returns as soon as the bridge exits; a wedged bridge is killed straight away
+            stop_process_group(self.bridge_process, timeout=5 if graceful else 0)
+            self.bridge_process = None
+            forget_pid(self._pid_name())
+        if self.watchdog:
+            self.watchdog.stop()
+            self.watchdog = None
+
+    def _pid_name(self):
+        """Name of the PID file recording the bridge started on our port"""
+        return f"bridge_daemon_{self.port}" if self.reuse else f"bridge_{self.port}"
+
+    def restart(self):
+        """Replace a dead or unresponsive bridge with a fresh one and start NVDA again"""
+        # A bridge being replaced may be wedged, don't wait for it to exit cleanly
+        self._stop_process(graceful=False)
+        with self.latency.measure("startup:bridge"):
+            self._start_bridge()
+        response = self.get("/start")
+        if response.status_code != 200:
+            raise Exception(f"Failed to start NVDA after restarting the bridge: {response.text}")
+
+    def stop_daemon(self, timeout=5):
+        """Stop NVDA and shut down a bridge daemon"""
+        if self.watchdog:
+            self.watchdog.expect_exit()
+        try:
+            self.get("/stop")
+            self.get("/exit")
+        finally:
+            # Let the daemon finish exiting first, so only one that did not is reaped
+            if self.bridge_process:
+                try:
+                    self.bridge_process.wait(timeout=timeout)
+                except subprocess.TimeoutExpired:
+                    pass
+                self._stop_process(graceful=False)
+            else:
+                pid = recorded_pid(self._pid_name())
+                if pid is not None:
+                    wait_for_exit(lambda: not is_running(pid), timeout)
+            # Make sure the daemon is gone even if it did not answer
+            reap_recorded(self._pid_name())
+
+    def _start_bridge(self):
+        """Start the Node.js bridge server and wait until it answers"""
+        bridge_script = os.path.join(os.getcwd(), "resources",
+                                    "mock_nvda.js" if self.mock else "guidepup_bridge.js")
+
+        if self.port == 0:
+            self.port = find_free_port()
+            self.url = f"http://localhost:{self.port}"
+
+        # A bridge a crashed run left on our port would keep it busy
+        reap_recorded(self._pid_name())
+
+        # The bridge runs in a process group of its own, so stopping it stops whatever it spawned
+        command = ["node", bridge_script, str(self.port)]
+        if self.reuse:
+            # A daemon must outlive this process, so detach it and log to a file
+            os.makedirs("results", exist_ok=True)
+            log_path = os.path.join("results", f"bridge_daemon_{self.port}.log")
+            detach = {"creationflags": subprocess.DETACHED_PROCESS} if sys.platform == 'win32' else {}
+            with open(log_path, "a") as log_file:
+                self.bridge_process = popen_group(command, stdout=log_file,
+                                                  stderr=subprocess.STDOUT, **detach)
+        else:
+            self.bridge_process = popen_group(command,
+                                              stdout=subprocess.PIPE,
+                                              stderr=subprocess.PIPE)
+        record_pid(self._pid_name(), self.bridge_process, os.path.basename(bridge_script))
+
+        # Drain the bridge's output and notice the moment it exits
+        self.watchdog = BridgeWatchdog(self.bridge_process, name=f"{self.name} bridge").start()
+
+        # Wait for the server to start answering requests
+        self._wait_for_bridge()
+
+    def is_healthy(self):
+        """Return True if a bridge of the expected kind is answering on our port"""
+        if self.port == 0:
+            return False
+        try:
+            response = self.get("/version", timeout=1)
+        except requests.exceptions.RequestException:
+            return False
+        if response.status_code != 200:
+            return False
+        is_mock = str(response.json().get('version', '')).startswith('mock')
+        return is_mock == bool(self.mock)
+
+    def _wait_for_bridge(self):
+        """Poll the bridge's /version endpoint with backoff until it answers"""
+        deadline = time.monotonic() + self.startup_timeout
+        delay = 0.05
+        while True:
+            # Fail straight away if the bridge process has already exited
+            if self.bridge_process.poll() is not None:
+                self.watchdog.exited.wait(timeout=1)
+                message = f"Bridge {self.watchdog.describe_exit()} before becoming ready"
+                self._stop_process(graceful=False)
+                raise Exception(message)
+            try:
+                response = self.get("/version", timeout=1)
+                if response.status_code == 200:
+                    return response.json()
+            except requests.exceptions.RequestException:
+                pass
+
+            if time.monotonic() >= deadline:
+                self._stop_process(graceful=False)
+                raise TimeoutError(f"Bridge at {self.url} was not ready "
+                                   f"within {self.startup_timeout} seconds")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def get(self, path, params=None, timeout=None, operation=None):
+        """Send a GET request to the bridge over the pooled session"""
+        return self._timed_request("GET", path, params=params, timeout=timeout, operation=operation)
+
+    def post(self, path, payload, timeout=None):
+        """POST a JSON payload to the bridge over the pooled session"""
+        return self._timed_request("POST", path, json=payload, timeout=timeout)
+
+    def remaining(self):
+        """Seconds left in the suite budget, or None without a budget"""
+        if self.deadline is None:
+            return None
+        return self.deadline - time.monotonic()
+
+    def _request_timeout(self, path, timeout):
+        """(connect, read) timeout for a call, within the suite budget"""
+        if timeout is None:
+            timeout = (self.timeout[0], self.operation_timeouts.get(path, self.timeout[1]))
+        elif not isinstance(timeout, tuple):
+            timeout = (min(self.timeout[0], timeout), timeout)
+        remaining = self.remaining()
+        if remaining is not None and path not in self.TEARDOWN_PATHS:
+            if remaining <= 0:
+                raise TimeoutError(f"Suite time budget exhausted before calling {path} on the bridge")
+            timeout = (min(timeout[0], remaining), min(timeout[1], remaining))
+        return timeout
+
+    def _check_alive(self, path):
+        """Fail straight away, with its stderr, if the bridge process has died"""
+        if self.watchdog is not None and not self.watchdog.is_alive():
+            self.watchdog.exited.wait(timeout=1)
+            raise BridgeError(f"Bridge {self.watchdog.describe_exit()} (calling {path})")
+
+    def _diagnose(self, path, timeout, error):
+        """Turn a failed request into an error saying what happened to the bridge"""
+        if self.watchdog is not None and self.watchdog.exited.wait(timeout=0.5):
+            return BridgeError(f"Bridge {self.watchdog.describe_exit()} (calling {path})")
+        remaining = self.remaining()
+        if isinstance(error, requests.exceptions.Timeout) and remaining is not None and remaining <= 0:
+            return TimeoutError(f"Suite time budget exhausted while waiting for {path} on the bridge")
+        if isinstance(error, requests.exceptions.Timeout):
+            # Tell a wedged bridge from a single slow operation
+            try:
+                self.session.get(f"{self.url}/version", timeout=(1, 1))
+                state = "is still answering"
+            except requests.exceptions.RequestException:
+                state = "is not answering at all"
+            return BridgeError(f"Bridge did not answer {path} within {timeout[1]:g}s and {state}")
+        return BridgeError(f"Bridge call {path} failed: {error}")
+
+    def _timed_request(self, method, path, timeout=None, operation=None, **kwargs):
+        """
+        Send a request and record its round trip, the bridge's own handling
+        time (from Server-Timing) and the difference, i.e. the transport cost
+
+        The timings are filed under ``operation``, the path by default.
+        """
+        timeout = self._request_timeout(path, timeout)
+        self._check_alive(path)
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, f"{self.url}{path}", timeout=timeout, **kwargs)
+        except requests.exceptions.RequestException as e:
+            raise self._diagnose(path, timeout, e) from e
+        elapsed = time.perf_counter() - started
+        operation = operation or path
+        self.latency.record(f"http:{operation}", elapsed)
+        server_ms = parse_server_timing(response.headers.get("Server-Timing"))
+        if server_ms is not None:
+            self.latency.record(f"server:{operation}", server_ms / 1000.0)
+            self.latency.record(f"transport:{operation}", max(elapsed - server_ms / 1000.0, 0.0))
+        return response
+
+    def wait_for_speech(self, since=None, timeout=5):
+        """Block until the bridge reports that speech has settled and return it"""
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = max(min(float(timeout), remaining), 0)
+        params = {
+            "timeout": int(float(timeout) * 1000),
+            "quiet": int(self.quiet_period * 1000)
+        }
+        if since is not None:
+            params["since"] = since
+        # Leave the HTTP call a little longer than the bridge-side wait
+        response = self.get("/wait", params=params,
+                            timeout=(self.timeout[0], float(timeout) + self.timeout[1]))
+        if response.status_code != 200:
+            raise Exception(f"Failed to wait for speech: {response.text}")
+        data = response.json()
+        if not data.get('settled'):
+            print(f"Speech did not settle within {timeout}s, using latest phrase")
+        return data.get('speech', '')
+
+    def _read_speech(self, operation=None):
+        response = self.get("/speak", operation=operation)
+        if response.status_code != 200:
+            raise Exception(f"Failed to read speech: {response.text}")
+        return response.json()
+
+    def speech_mark(self):
+        return self._read_speech().get('spokenCount')
+
+    def capture_speech(self, since=None, timeout=5):
+        """
+        Poll /speak until speech after ``since`` has settled and return it
+
+        A /wait would hold the bridge's command queue until speech settles,
+        so keywords called while the capture runs, and whose key presses may
+        be what makes the screen reader speak, would queue behind it. Each
+        /speak is a short queue entry instead; the polls are timed as
+        ``/speak(capture)`` so they do not skew the stats of real /speak calls.
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = max(min(float(timeout), remaining), 0)
+        deadline = time.monotonic() + float(timeout)
+        data = self._read_speech(self.CAPTURE_OPERATION)
+        changed_at = time.monotonic()
+        while True:
+            now = time.monotonic()
+            heard_new = since is None or (data.get('spokenCount') or 0) > since
+            if heard_new and now - changed_at >= self.quiet_period:
+                return data.get('speech', '')
+            if now >= deadline:
+                print(f"Speech did not settle within {timeout}s, using latest phrase")
+                return data.get('speech', '')
+            time.sleep(self.CAPTURE_POLL_INTERVAL)
+            latest = self._read_speech(self.CAPTURE_OPERATION)
+            if (latest.get('spokenCount'), latest.get('speech')) != (data.get('spokenCount'), data.get('speech')):
+                data = latest
+                changed_at = time.monotonic()
+
+    @retry_after_restart
+    def focus(self, selector, timeout=5):
+        # Only the mock tracks focus, the real browser focus is driven by Playwright
+        if self.mock:
+            response = self.get("/focus", params={"selector": selector})
+            if response.status_code != 200:
+                raise Exception(f"Failed to focus element: {response.text}")
+
+        # When an element is focused in the browser, the screen reader announces it
+        # We simulate pressing Enter to activate the screen reader
+        response = self.get("/act")
+        if response.status_code != 200:
+            raise Exception(f"Failed to perform action: {response.text}")
+
+        # Wait for the announcement triggered by the action to finish
+        spoken_count = response.json().get('spokenCount')
+        return self.wait_for_speech(since=spoken_count, timeout=timeout)
+
+    @retry_after_restart
+    def speak(self):
+        response = self.get("/speak")
+        data = response.json()
+        return data.get('speech', '')
+
+    @retry_after_restart
+    def press(self, key):
+        response = self.get("/press", params={"key": key})
+        if response.status_code != 200:
+            raise Exception(f"Failed to press key: {response.text}")
+        return response.json()
+
+    @retry_after_restart
+    def navigate(self, key, timeout=5):
+        result = self.press(key)
+        # Wait for what pressing the key made the screen reader say
+        speech = self.wait_for_speech(since=result.get('spokenCount'), timeout=timeout)
+        navigation = {"speech": speech}
+        if result.get('focused'):
+            navigation["focused"] = result['focused']
+        return navigation
+
+    @retry_after_restart
+    def capture_many(self, selectors, timeout=5):
+        """
+        Capture speech for all selectors in a single /batch request
+
+        Only the mock bridge can move focus to a selector; the Guidepup bridge
+        leaves focus to the browser and rejects batched focus steps.
+        """
+        if not self.mock:
+            raise Exception("Capturing speech for a list of selectors needs the mock bridge, the Guidepup "
+                            "bridge cannot move focus; focus each element in the browser and use Focus Element")
+        wait_step = {
+            "action": "wait",
+            "timeout": int(float(timeout) * 1000),
+            "quiet": int(self.quiet_period * 1000)
+        }
+        actions = []
+        for selector in selectors:
+            actions.append({"action": "focus", "selector": selector})
+            actions.append({"action": "act"})
+            actions.append(dict(wait_step))
+
+        # The bridge may spend up to `timeout` seconds waiting on each element
+        read_timeout = self.timeout[1] + float(timeout) * len(selectors)
+        response = self.post("/batch", actions, timeout=(self.timeout[0], read_timeout))
+        if response.status_code != 200:
+            raise Exception(f"Failed to capture speech: {response.text}")
+
+        captured = []
+        selector = None
+        for step in response.json().get('results', []):
+            if 'error' in step:
+                raise Exception(f"Failed to capture speech for {selector}: {step['error']}")
+            if step['action'] == 'focus':
+                selector = step.get('selector')
+            elif step['action'] == 'wait':
+                captured.append({"selector": selector, "speech": step.get('speech', '')})
+        return captured
+
+
+class DirectBackend(NVDABackend):
+    """
+    Runs the installed NVDA directly, through NVDADirect when available
+
+    With ``attach`` the backend reads speech from an NVDA someone else
+    started (e.g. run_nvda_test.py) and neither starts, reaps nor stops it.
+    """
+
+    name = "direct"
+
+    def __init__(self, nvda_path, startup_timeout=30, quiet_period=0.2, latency=None, attach=False):
+        self.latency = latency or LatencyRecorder()
+        self.nvda_path = nvda_path
+        self.startup_timeout = startup_timeout
+        self.quiet_period = quiet_period
+        self.attach = attach
+        self.nvda = None
+        self.nvda_process = None
+
+    def start(self):
+        if self.attach:
+            # Only read what the running NVDA logs from now on
+            if NVDA_DIRECT_AVAILABLE:
+                self.nvda = NVDADirect(nvda_path=self.nvda_path, startup_timeout=self.startup_timeout)
+                if not self.nvda.is_process_running():
+                    raise Exception("No running NVDA to attach to")
+            return
+        # Start NVDA directly using NVDADirect if available
+        if NVDA_DIRECT_AVAILABLE:
+            self.nvda = NVDADirect(nvda_path=self.nvda_path, startup_timeout=self.startup_timeout)
+            with self.latency.measure("startup:nvda"):
+                self.nvda.start()
+        else:
+            # Fall back to basic subprocess if NVDADirect not available
+            if not os.path.exists(self.nvda_path):
+                raise Exception(f"NVDA not found at {self.nvda_path}")
+            print(f"Starting NVDA directly from {self.nvda_path}")
+            self.nvda_process = popen_group([self.nvda_path])
+
+    def stop(self):
+        if self.attach:
+            # NVDA belongs to whoever started it
+            self.nvda = None
+            return
+        # Stop direct NVDA process using NVDADirect if available
+        if self.nvda:
+            self.nvda.stop()
+        elif self.nvda_process:
+            # Ask NVDA to quit, kill the process we started if it does not
+            stop_process_group(self.nvda_process,
+                               graceful=lambda: subprocess.run([self.nvda_path, "-q"], capture_output=True))
+            self.nvda_process = None
+
+    def focus(self, selector, timeout=5):
+        # With direct NVDA, speech is read back from NVDA's log
+        if self.nvda:
+            # Without a log to read (e.g. NVDA started elsewhere without it) fall back to simulated speech
+            if not self.nvda.speech_log_available():
+                self.nvda.simulate_speech(f"Element focused: {selector}")
+            with self.latency.measure("speech:wait"):
+                return self.nvda.wait_for_speech(timeout=timeout, quiet_period=self.quiet_period)
+        # Fallback to simulated speech, there is nothing to wait for
+        return f"Element focused: {selector}"  # Simulated speech for direct NVDA
+
+    def speak(self):
+        if self.nvda:
+            return self.nvda.get_speech()
+        return None
+
+    def speech_is_simulated(self):
+        # Without NVDADirect or its log, focus returns "Element focused: ..." placeholders
+        return not self.nvda or not self.nvda.speech_log_available()
+
+    def speech_mark(self):
+        if not self.nvda:
+            return None
+        # Count what NVDA has logged up to now, so only later speech is waited for
+        self.nvda.get_speech()
+        return self.nvda.spoken_count
+
+    def wait_for_speech(self, since=None, timeout=5):
+        if not self.nvda:
+            return None
+        with self.latency.measure("speech:wait"):
+            return self.nvda.wait_for_speech(timeout=timeout, quiet_period=self.quiet_period, since=since)
+
+    def press(self, key):
+        # For direct NVDA, use NVDADirect if available
+        if self.nvda:
+            self.nvda.send_keys(key)
+        else:
+            # Otherwise just log
+            print(f"Simulating key press: {key}")
+        return {"status": "key_pressed", "key": key}
+
+    def navigate(self, key, timeout=5):
+        if not self.nvda:
+            self.press(key)
+            return {"speech": None}
+        # Wait for what pressing the key made NVDA say
+        spoken_count = self.nvda.spoken_count
+        self.press(key)
+        with self.latency.measure("speech:wait"):
+            return {"speech": self.nvda.wait_for_speech(timeout=timeout, quiet_period=self.quiet_period,
+                                                        since=spoken_count)}
+
+
+class InProcessMockBackend(NVDABackend):
+    """
+    Mock screen reader answered directly in Python
+
+    Uses the same response catalogues as mock_nvda.js, without a child process
+    or HTTP, for suites that only exercise keyword logic. Catalogues edited on
+    disk are picked up the next time the mock starts, or on ``reload``.
+    """
+
+    name = "inprocess"
+    simulated_focus = True
+    # Keys that move focus, and in which direction
+    TAB_KEYS = {"Tab": 1, "Shift+Tab": -1}
+
+    def __init__(self, responses_file=None):
+        self.catalogue = MockCatalogue([responses_file] if responses_file else None)
+        self.running = False
+        self.last_focused_element = None
+        # Announcements so far, signalled to captures waiting on another thread
+        self.spoken_count = 0
+        self.spoken = threading.Condition()
+
+    def reload(self):
+        """Reload the response catalogues"""
+        return self.catalogue.reload()
+
+    def _require_running(self):
+        if not self.running:
+            raise Exception("Mock NVDA not running")
+
+    def start(self):
+        self.catalogue.reload_if_changed()
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def focus(self, selector, timeout=5):
+        self._require_running()
+        self.last_focused_element = selector
+        self._announce()
+        return self.speak()
+
+    def speak(self):
+        self._require_running()
+        speech = None
+        if self.last_focused_element:
+            speech = self.catalogue.lookup(self.last_focused_element)
+        return speech or 'No element focused'
+
+    def press(self, key):
+        self._require_running()
+        step = self.TAB_KEYS.get(key)
+        if step is None:
+            return {"status": "key_pressed", "key": key}
+        # Tab and Shift+Tab move focus through the catalogue's elements
+        self.last_focused_element = self.catalogue.next_in_tab_order(self.last_focused_element, step)
+        self._announce()
+        return {"status": "key_pressed", "key": key, "focused": self.last_focused_element}
+
+    def _announce(self):
+        with self.spoken:
+            self.spoken_count += 1
+            self.spoken.notify_all()
+
+    def speech_mark(self):
+        return self.spoken_count
+
+    def wait_for_speech(self, since=None, timeout=5):
+        # Speech is immediate here, only wait for something new to be announced
+        with self.spoken:
+            self.spoken.wait_for(lambda: since is None or self.spoken_count > since, float(timeout))
+        return self.speak()
+
+    def navigate(self, key, timeout=5):
+        result = self.press(key)
+        navigation = {"speech": self.speak()}
+        if result.get("focused"):
+            navigation["focused"] = result["focused"]
+        return navigation
+
+
+def find_free_port():
+    """Ask the OS for a currently unused local TCP port"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
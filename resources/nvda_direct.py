@@ -5,9 +5,14 @@ Uses pywinauto for Windows application interaction
 
 import os
 import time
+import tempfile
+import threading
 import subprocess
 import logging
 
+from nvda_log_tail import NVDALogTailer
+from process_utils import popen_group, stop_process_group, stop_pid, pids_by_image, wait_for_exit
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("NVDADirect")
@@ -17,30 +22,106 @@ class NVDADirect:
     Class for directly controlling NVDA screen reader
     """
     
-    def __init__(self, nvda_path="C:\\Program Files (x86)\\NVDA\\nvda.exe"):
+    # NVDA logs what it speaks at the IO level
+    SPEECH_LOG_LEVEL = 12
+    # Executables a running NVDA may show up as (installed copies restart with UI access)
+    PROCESS_IMAGES = ("nvda.exe", "nvda_uiAccess.exe", "nvda_noUIAccess.exe")
+    
+    def __init__(self, nvda_path="C:\\Program Files (x86)\\NVDA\\nvda.exe", startup_timeout=30, log_path=None):
         self.nvda_path = nvda_path
+        self.startup_timeout = startup_timeout
         self.nvda_process = None
         self.running = False
         self.last_speech = ""
+        # Utterances heard so far and when the latest one arrived
+        self.spoken_count = 0
+        self.last_spoken_at = time.monotonic()
+        # Speech may be read from a capture thread while keywords run
+        self.speech_lock = threading.Lock()
+        # Speech is read back from NVDA's log, which we ask NVDA to write here
+        self.log_path = log_path or os.environ.get("NVDA_LOG_PATH") or os.path.join(tempfile.gettempdir(), "nvda.log")
+        self.log_tailer = NVDALogTailer(self.log_path, from_end=True)
         
     def start(self):
         """Start NVDA screen reader"""
         if not os.path.exists(self.nvda_path):
             raise FileNotFoundError(f"NVDA not found at {self.nvda_path}")
         
-        logger.info(f"Starting NVDA from {self.nvda_path}")
-        self.nvda_process = subprocess.Popen([self.nvda_path], shell=True)
-        time.sleep(5)  # Give NVDA time to start
+        # An NVDA left over from an earlier run would hold on to the speech log
+        self.reap_stray_instances()
+        
+        logger.info(f"Starting NVDA from {self.nvda_path}, logging speech to {self.log_path}")
+        # Only speech logged from now on is of interest
+        self.log_tailer = NVDALogTailer(self.log_path, from_end=True)
+        self.nvda_process = popen_group([self.nvda_path, f"--log-file={self.log_path}",
+                                         f"--log-level={self.SPEECH_LOG_LEVEL}"])
+        self.wait_until_ready()
         self.running = True
         return True
+    
+    def running_pids(self):
+        """PIDs of every running NVDA process"""
+        return [pid for image in self.PROCESS_IMAGES for pid in pids_by_image(image)]
+    
+    def is_process_running(self):
+        """Check whether an NVDA process is currently running"""
+        return bool(self.running_pids())
+    
+    def request_quit(self):
+        """Ask the running NVDA to quit by itself (nvda -q)"""
+        subprocess.run([self.nvda_path, "-q"], capture_output=True)
+    
+    def reap_stray_instances(self, timeout=5):
+        """Quit NVDA instances already running, forcing those that do not exit in time"""
+        if not self.is_process_running():
+            return
+        logger.info("Stopping an NVDA instance that is already running")
+        self.request_quit()
+        if not wait_for_exit(lambda: not self.is_process_running(), timeout):
+            for pid in self.running_pids():
+                stop_pid(pid, timeout)
+    
+    def wait_until_ready(self):
+        """
+        Wait until NVDA logs that it has initialized, polling its log with backoff
+        
+        Raises TimeoutError if NVDA has not initialized within startup_timeout seconds.
+        """
+        deadline = time.monotonic() + self.startup_timeout
+        delay = 0.1
+        while True:
+            # Reading through get_speech keeps count of anything spoken during startup
+            self.get_speech()
+            if self.log_tailer.initialized:
+                break
+            if self.nvda_process and self.nvda_process.poll() is not None and not self.is_process_running():
+                raise Exception(f"NVDA exited with code {self.nvda_process.returncode} before initializing")
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"NVDA did not initialize within {self.startup_timeout} seconds "
+                                   f"(no 'NVDA initialized' entry in {self.log_path})")
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+        logger.info("NVDA is initialized")
+        
+    def stop(self, timeout=5):
+        """
+        Stop NVDA screen reader
         
-    def stop(self):
-        """Stop NVDA screen reader"""
+        Asks NVDA to quit and returns as soon as it has; NVDA processes still
+        running after ``timeout`` seconds are killed.
+        """
         logger.info("Stopping NVDA")
-        if self.running:
+        # Also clean up after a start that timed out before NVDA was ready
+        if self.running or self.nvda_process:
             try:
-                # Use Windows taskkill to close NVDA
-                subprocess.run(['taskkill', '/IM', 'nvda.exe', '/F'], capture_output=True)
+                self.request_quit()
+                # NVDA may have restarted itself under another PID, e.g. with UI access
+                if not wait_for_exit(lambda: not self.is_process_running(), timeout):
+                    for pid in self.running_pids():
+                        stop_pid(pid, timeout)
+                if self.nvda_process:
+                    # Reap the process we started and anything left in its group
+                    stop_process_group(self.nvda_process, timeout=0)
                 self.nvda_process = None
                 self.running = False
                 return True
@@ -53,14 +134,40 @@ class NVDADirect:
         """
         Get the last spoken text by NVDA
         
-        Note: This is a placeholder. In a real implementation, you would need to:
-        1. Access NVDA's speech output through its Python API or
-        2. Use a speech recognition system to capture what NVDA speaks, or
-        3. Configure NVDA to write speech to a log file and read from it
+        Reads whatever NVDA has logged since the previous call from its log
+        file; speech set with simulate_speech is returned until NVDA says
+        something newer.
+        """
+        with self.speech_lock:
+            for utterance in self.log_tailer.read():
+                self._heard(utterance["speech"])
+            return self.last_speech
+    
+    def speech_log_available(self):
+        """Return True if NVDA's log file exists to read speech from"""
+        return os.path.exists(self.log_path)
+    
+    def _heard(self, speech):
+        self.last_speech = speech
+        self.spoken_count += 1
+        self.last_spoken_at = time.monotonic()
+    
+    def wait_for_speech(self, timeout=5, quiet_period=0.2, since=None):
+        """
+        Wait until NVDA's speech has settled and return it
+        
+        Returns once nothing new has been spoken for ``quiet_period`` seconds,
+        after at least one utterance beyond ``since`` (a spoken_count) when it
+        is given, or when ``timeout`` seconds have passed.
         """
-        logger.info("Getting NVDA speech")
-        # In a real implementation, this would capture actual speech
-        return self.last_speech
+        deadline = time.monotonic() + float(timeout)
+        while True:
+            speech = self.get_speech()
+            now = time.monotonic()
+            heard_new = since is None or self.spoken_count > since
+            if (heard_new and now - self.last_spoken_at >= quiet_period) or now >= deadline:
+                return speech
+            time.sleep(min(0.05, quiet_period))
     
     def send_keys(self, keys):
         """Send keyboard input to NVDA"""
@@ -74,8 +181,9 @@ class NVDADirect:
         Simulate speech output from NVDA (for testing without actual speech capture)
         """
         logger.info(f"Simulating NVDA speech: {text}")
-        self.last_speech = text
-        return self.last_speech
+        with self.speech_lock:
+            self._heard(text)
+            return self.last_speech
         
 # Testing code
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+"""
+Incremental reader for NVDA's log file
+NVDA writes everything it speaks to its log at the IO level (``--log-level=12``)
+as entries like:
+
+    IO - speech.speech.speak (10:15:32.118) - MainThread (10896):
+    Speaking ['Welcome', 'heading', 'level 1']
+
+The tailer remembers its byte offset between reads, so each poll only reads
+what NVDA appended since the last one, however large the log has grown. A new
+file at the same path (NVDA moves nvda.log to nvda-old.log when it starts) or
+a file smaller than the offset is treated as a rotation and read from the start.
+"""
+
+import os
+import re
+import sys
+import ast
+import time
+from datetime import datetime
+
+# Header line that starts every log entry
+ENTRY_HEADER = re.compile(
+    r"^(?P<level>[A-Z]+) - (?P<source>[\w.]+) \((?P<time>\d{2}:\d{2}:\d{2}(?:\.\d+)?)\)"
+    r"(?: - (?P<thread>.+?))?:\s*$")
+SPEECH_SOURCE = "speech.speech.speak"
+SPEECH_MARKER = f"{SPEECH_SOURCE} (".encode("ascii")
+SPEAKING_PREFIX = "Speaking "
+# Message NVDA logs at INFO once it has finished starting up
+INITIALIZED_MESSAGE = "NVDA initialized"
+INITIALIZED_MARKER = INITIALIZED_MESSAGE.encode("ascii")
+# Quoted strings in the repr of a speech sequence; commands in it are skipped
+QUOTED_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def parse_speech_sequence(text):
+    """Return the spoken strings from the repr of an NVDA speech sequence"""
+    strings = []
+    for match in QUOTED_STRING.finditer(text):
+        # Only items of the sequence itself, not arguments of commands like LangChangeCommand ('en')
+        if text[:match.start()].rstrip()[-1:] not in ("[", ","):
+            continue
+        try:
+            value = ast.literal_eval(match.group(0))
+        except (ValueError, SyntaxError):
+            continue
+        if value.strip():
+            strings.append(value.strip())
+    return strings
+
+
+class NVDALogTailer:
+    """
+    Reads utterances from an NVDA log file as it grows
+
+    With ``from_end`` the existing contents are skipped and only speech
+    logged after the tailer was created is returned.
+    """
+
+    def __init__(self, path, from_end=True, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.offset = 0
+        self.file_id = None
+        self._partial = b""
+        self._speech_entry_time = None
+        self._entry_level = None
+        # Set once NVDA has logged that it finished starting up
+        self.initialized = False
+        if from_end:
+            status = self._stat()
+            if status is not None:
+                self.file_id = (status.st_dev, status.st_ino)
+                self.offset = status.st_size
+
+    def _stat(self):
+        try:
+            return os.stat(self.path)
+        except OSError:
+            return None
+
+    def read(self):
+        """Return utterances logged since the last read, each with ``timestamp`` and ``speech``"""
+        status = self._stat()
+        if status is None:
+            return []
+
+        # A different file, or one shorter than what was read, means the log was rotated
+        file_id = (status.st_dev, status.st_ino)
+        if file_id != self.file_id or status.st_size < self.offset:
+            self.file_id = file_id
+            self.offset = 0
+            self._partial = b""
+            self._speech_entry_time = None
+        if status.st_size == self.offset:
+            return []
+
+        # Open per read so the file is never held while NVDA rotates it
+        utterances = []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self.offset += len(chunk)
+                data = self._partial + chunk
+                # The last line has no newline yet, keep it for the next read
+                end = data.rfind(b"\n") + 1
+                data, self._partial = data[:end], data[end:]
+                # Most of a busy log is not speech, skip such stretches without splitting them
+                if (self._speech_entry_time is None and SPEECH_MARKER not in data
+                        and (self.initialized or INITIALIZED_MARKER not in data)):
+                    continue
+                for line in data.split(b"\n"):
+                    line = line.rstrip(b"\r")
+                    # Only entry headers, the line after a speech header and the startup message matter
+                    if (self._speech_entry_time is None and not line.endswith(b":")
+                            and line.strip() != INITIALIZED_MARKER):
+                        continue
+                    utterance = self._parse_line(line.decode(self.encoding, errors="replace"))
+                    if utterance is not None:
+                        utterances.append(utterance)
+        return utterances
+
+    def _parse_line(self, line):
+        header = ENTRY_HEADER.match(line)
+        if header:
+            self._speech_entry_time = header.group("time") if header.group("source") == SPEECH_SOURCE else None
+            self._entry_level = header.group("level")
+            return None
+        if self._entry_level == "INFO" and line.strip() == INITIALIZED_MESSAGE:
+            self.initialized = True
+            return None
+        if self._speech_entry_time is None or not line.startswith(SPEAKING_PREFIX):
+            return None
+
+        entry_time = self._speech_entry_time
+        self._speech_entry_time = None
+        speech = ", ".join(parse_speech_sequence(line[len(SPEAKING_PREFIX):]))
+        if not speech:
+            return None
+        # The log only has the time of day, the entry was written today
+        clock = datetime.strptime(entry_time, "%H:%M:%S.%f" if "." in entry_time else "%H:%M:%S").time()
+        return {"timestamp": datetime.combine(datetime.now().date(), clock).isoformat(),
+                "speech": speech}
+
+
+def main(argv):
+    """Print the utterances in an NVDA log, and with --follow keep printing new ones"""
+    follow = "--follow" in argv
+    paths = [arg for arg in argv[1:] if arg != "--follow"]
+    if len(paths) != 1:
+        print("Usage: python nvda_log_tail.py <path to nvda.log> [--follow]")
+        return 1
+
+    tailer = NVDALogTailer(paths[0], from_end=False)
+    try:
+        while True:
+            for utterance in tailer.read():
+                print(f"{utterance['timestamp']}  {utterance['speech']}")
+            if not follow:
+                return 0
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
@@ -0,0 +1,215 @@
+"""
+Child process ownership for the library and the runners
+Children are started in their own process group (a new session on POSIX, a
+new process group on Windows) without a shell, so the PID we hold is the real
+process and stopping the group also stops anything it spawned. Stopping is
+graceful first, then forced, and returns as soon as the process has exited.
+PID files let the next run reap processes a crashed run left behind.
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import subprocess
+
+logger = logging.getLogger("ProcessUtils")
+
+IS_WINDOWS = sys.platform == 'win32'
+PID_DIR = os.path.join("results", "pids")
+
+
+def popen_group(command, **kwargs):
+    """Start ``command`` (a list, never through a shell) in a process group of its own"""
+    if IS_WINDOWS:
+        kwargs["creationflags"] = kwargs.get("creationflags", 0) | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen(command, **kwargs)
+
+
+def _signal_group(pid, force):
+    """Ask (or, with ``force``, make) a process group to exit"""
+    try:
+        if IS_WINDOWS:
+            if force:
+                subprocess.run(['taskkill', '/PID', str(pid), '/T', '/F'], capture_output=True)
+            else:
+                os.kill(pid, signal.CTRL_BREAK_EVENT)
+        else:
+            os.killpg(pid, signal.SIGKILL if force else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError, OSError):
+        # Already gone, or not ours to signal
+        pass
+
+
+def is_running(pid):
+    """Return True if a process with this PID exists"""
+    if IS_WINDOWS:
+        result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}', '/FO', 'CSV', '/NH'],
+                                capture_output=True, text=True)
+        return f'"{pid}"' in result.stdout
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def wait_for_exit(is_gone, timeout):
+    """Poll ``is_gone()`` with backoff until it is true or ``timeout`` passes; return its last value"""
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    while not is_gone():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(delay)
+        delay = min(delay * 2, 0.25)
+    return True
+
+
+def stop_process_group(process, timeout=5, graceful=None):
+    """
+    Stop a process started with popen_group, and everything in its group
+
+    ``graceful`` may be a callable that asks the process to quit by itself;
+    otherwise the group is sent SIGTERM (CTRL_BREAK on Windows). If it has
+    not exited after ``timeout`` seconds the group is killed. Returns the
+    exit code.
+    """
+    if process.poll() is None:
+        if graceful is not None:
+            graceful()
+        else:
+            _signal_group(process.pid, force=False)
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            if timeout:
+                logger.warning(f"Process {process.pid} did not exit within {timeout}s, killing it")
+    # Kill the group even after a clean exit, in case it left children behind
+    if not IS_WINDOWS or process.poll() is None:
+        _signal_group(process.pid, force=True)
+    if process.poll() is None:
+        process.wait(timeout=5)
+    return process.returncode
+
+
+def run_in_group(command, timeout=5, **kwargs):
+    """
+    Run ``command`` to completion in its own process group and return its exit code
+
+    If we are interrupted (Ctrl+C) or fail while it runs, the whole group is
+    stopped before the exception propagates, so no grandchildren outlive us.
+    """
+    process = popen_group(command, **kwargs)
+    try:
+        return process.wait()
+    except BaseException:
+        stop_process_group(process, timeout=timeout)
+        raise
+
+
+def stop_pid(pid, timeout=5):
+    """Stop a process (and its group) we only know by PID, graceful first, then forced"""
+    if not is_running(pid):
+        return True
+    _signal_group(pid, force=False)
+    if wait_for_exit(lambda: not is_running(pid), timeout):
+        return True
+    _signal_group(pid, force=True)
+    return wait_for_exit(lambda: not is_running(pid), timeout)
+
+
+def _command_line(pid):
+    """Best-effort command line (POSIX) or image name (Windows) of a process"""
+    try:
+        if IS_WINDOWS:
+            result = subprocess.run(['tasklist', '/FI', f'PID eq {pid}', '/FO', 'CSV', '/NH'],
+                                    capture_output=True, text=True)
+            return result.stdout
+        proc_cmdline = f"/proc/{pid}/cmdline"
+        if os.path.exists(proc_cmdline):
+            with open(proc_cmdline, 'rb') as f:
+                return f.read().replace(b"\0", b" ").decode(errors="replace")
+        result = subprocess.run(['ps', '-p', str(pid), '-o', 'command='], capture_output=True, text=True)
+        return result.stdout
+    except OSError:
+        return ""
+
+
+def record_pid(name, process, marker):
+    """
+    Remember a child in results/pids/<name>.pid so a later run can reap it
+
+    ``marker`` is a string expected in the process's command line, so a
+    recycled PID is never mistaken for ours.
+    """
+    os.makedirs(PID_DIR, exist_ok=True)
+    with open(os.path.join(PID_DIR, f"{name}.pid"), 'w', encoding='utf-8') as f:
+        json.dump({"pid": process.pid, "marker": marker}, f)
+
+
+def forget_pid(name):
+    try:
+        os.remove(os.path.join(PID_DIR, f"{name}.pid"))
+    except OSError:
+        pass
+
+
+def _read_pid_file(name):
+    try:
+        with open(os.path.join(PID_DIR, f"{name}.pid"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def recorded_pid(name):
+    """PID recorded under ``name``, or None"""
+    recorded = _read_pid_file(name)
+    return recorded.get("pid") if recorded else None
+
+
+def recorded_names():
+    """Names of the processes that have PID files"""
+    try:
+        return sorted(os.path.splitext(entry)[0] for entry in os.listdir(PID_DIR) if entry.endswith(".pid"))
+    except OSError:
+        return []
+
+
+def reap_recorded(name, timeout=5):
+    """Stop a process recorded under ``name`` by an earlier run, if it is still there"""
+    recorded = _read_pid_file(name)
+    if recorded is None:
+        return False
+
+    pid = recorded.get("pid")
+    reaped = False
+    if pid and is_running(pid) and recorded.get("marker", "") in _command_line(pid):
+        logger.info(f"Reaping stray process {pid} ({recorded.get('marker')}) left by an earlier run")
+        reaped = stop_pid(pid, timeout)
+    forget_pid(name)
+    return reaped
+
+
+def pids_by_image(image_name):
+    """PIDs of processes with this executable name, e.g. nvda.exe"""
+    if IS_WINDOWS:
+        result = subprocess.run(['tasklist', '/FI', f'IMAGENAME eq {image_name}', '/FO', 'CSV', '/NH'],
+                                capture_output=True, text=True)
+        pids = []
+        for line in result.stdout.splitlines():
+            fields = [field.strip('"') for field in line.split('","')]
+            if len(fields) > 1 and fields[0].lower() == image_name.lower() and fields[1].isdigit():
+                pids.append(int(fields[1]))
+        return pids
+    result = subprocess.run(['ps', '-eo', 'pid=,comm='], capture_output=True, text=True)
+    return [int(pid) for pid, _, command in
+            (line.strip().partition(" ") for line in result.stdout.splitlines())
+            if os.path.basename(command.strip()) == image_name]
@@ -0,0 +1,228 @@
+"""
+Cross-run store of captured speech
+Every run's speech goes into one SQLite database, indexed by page, element
+and run, so a run can be compared with a baseline run, or with the last N
+runs, in a single query instead of reading each run's speech log.
+
+    python speech_baseline.py runs
+    python speech_baseline.py diff [--run ID] [--baseline ID | --last N]
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+from datetime import datetime
+
+DEFAULT_PATH = os.path.join("results", "speech_baseline.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at TEXT NOT NULL,
+    finished_at TEXT,
+    label TEXT,
+    backend TEXT
+);
+CREATE TABLE IF NOT EXISTS speech (
+    id INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    page TEXT NOT NULL,
+    element TEXT NOT NULL,
+    speech TEXT,
+    passed INTEGER,
+    recorded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS speech_by_run ON speech (run_id, page, element);
+CREATE INDEX IF NOT EXISTS speech_by_element ON speech (page, element, run_id);
+CREATE INDEX IF NOT EXISTS runs_by_label ON runs (label, id);
+"""
+
+# The latest speech per page and element of each run in `scope`, then the
+# current run compared with the most recent baseline run that has the element
+DIFF_QUERY = """
+WITH latest AS (
+    SELECT run_id, page, element, speech
+    FROM speech
+    WHERE id IN (SELECT MAX(id) FROM speech
+                 WHERE run_id IN (SELECT id FROM scope)
+                 GROUP BY run_id, page, element)
+),
+current AS (
+    SELECT page, element, speech FROM latest WHERE run_id = :run
+),
+baseline AS (
+    SELECT page, element, speech FROM (
+        SELECT page, element, speech,
+               ROW_NUMBER() OVER (PARTITION BY page, element ORDER BY run_id DESC) AS recency
+        FROM latest WHERE run_id != :run
+    ) WHERE recency = 1
+)
+SELECT current.page, current.element,
+       CASE WHEN baseline.element IS NULL THEN 'added' ELSE 'changed' END,
+       baseline.speech, current.speech
+FROM current LEFT JOIN baseline
+    ON baseline.page = current.page AND baseline.element = current.element
+WHERE baseline.element IS NULL OR baseline.speech IS NOT current.speech
+UNION ALL
+SELECT baseline.page, baseline.element, 'removed', baseline.speech, NULL
+FROM baseline LEFT JOIN current
+    ON current.page = baseline.page AND current.element = baseline.element
+WHERE current.element IS NULL
+ORDER BY 1, 2
+"""
+
+
+class SpeechBaseline:
+    """
+    SQLite store of speech across runs
+
+    Records are buffered and written in batches of ``batch_size``; call
+    ``close`` (or ``flush``) to write the rest.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=500):
+        self.path = path
+        self.batch_size = int(batch_size)
+        self._pending = []
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        # WAL lets a diff read the store while a suite is writing to it
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def start_run(self, label=None, backend=None):
+        """Register a new run and return its id"""
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started_at, label, backend) VALUES (?, ?, ?)",
+                (datetime.now().isoformat(), label, backend))
+        return cursor.lastrowid
+
+    def record(self, run_id, page, element, speech, passed=None):
+        """Queue one element's speech for the run"""
+        self._pending.append((run_id, page or "", element, speech,
+                              None if passed is None else int(bool(passed)),
+                              datetime.now().isoformat()))
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write queued records in one transaction"""
+        if not self._pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO speech (run_id, page, element, speech, passed, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)", self._pending)
+        self._pending = []
+
+    def finish_run(self, run_id):
+        """Write the run's remaining records and mark it finished"""
+        self.flush()
+        with self.connection:
+            self.connection.execute("UPDATE runs SET finished_at = ? WHERE id = ?",
+                                    (datetime.now().isoformat(), run_id))
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def runs(self, limit=20, label=None):
+        """Return the most recent runs, newest first, with their record counts"""
+        query = ("SELECT runs.id, runs.started_at, runs.finished_at, runs.label, runs.backend, "
+                 "(SELECT COUNT(*) FROM speech WHERE speech.run_id = runs.id) "
+                 "FROM runs {where} ORDER BY runs.id DESC LIMIT ?")
+        params = (label, int(limit)) if label is not None else (int(limit),)
+        rows = self.connection.execute(query.format(where="WHERE label = ?" if label is not None else ""),
+                                       params).fetchall()
+        return [dict(zip(("id", "started_at", "finished_at", "label", "backend", "records"), row))
+                for row in rows]
+
+    def latest_run(self, label=None):
+        """Return the id of the newest run, or None if the store is empty"""
+        runs = self.runs(limit=1, label=label)
+        return runs[0]["id"] if runs else None
+
+    def diff(self, run_id, baseline_run_id=None, last=1):
+        """
+        Compare a run's speech with a baseline
+
+        The baseline is ``baseline_run_id`` if given, otherwise the ``last``
+        runs before ``run_id`` with the same label and backend, taking for
+        each element the speech from the most recent of them that captured
+        it. Returns dictionaries with
+        ``page``, ``element``, ``status`` (added, changed or removed),
+        ``baseline`` and ``current`` speech.
+        """
+        self.flush()
+        if baseline_run_id is not None:
+            scope = [run_id, baseline_run_id]
+        else:
+            # Runs of other suites or backends speak for other pages, they are no baseline
+            scope = [run_id] + [row[0] for row in self.connection.execute(
+                "SELECT id FROM runs WHERE id < ? "
+                "AND label IS (SELECT label FROM runs WHERE id = ?) "
+                "AND backend IS (SELECT backend FROM runs WHERE id = ?) "
+                "ORDER BY id DESC LIMIT ?", (run_id, run_id, run_id, int(last)))]
+
+        self.connection.execute("CREATE TEMP TABLE IF NOT EXISTS scope (id INTEGER PRIMARY KEY)")
+        self.connection.execute("DELETE FROM scope")
+        self.connection.executemany("INSERT INTO scope (id) VALUES (?)", [(run,) for run in scope])
+        rows = self.connection.execute(DIFF_QUERY, {"run": run_id}).fetchall()
+        return [dict(zip(("page", "element", "status", "baseline", "current"), row)) for row in rows]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="speech_baseline.py",
+                                     description="Inspect and diff the cross-run speech store")
+    parser.add_argument("--db", default=DEFAULT_PATH, help=f"speech store (default: {DEFAULT_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    runs_parser = commands.add_parser("runs", help="list recent runs")
+    runs_parser.add_argument("--limit", type=int, default=20)
+    runs_parser.add_argument("--label", help="only runs with this label")
+
+    diff_parser = commands.add_parser("diff", help="compare a run with a baseline")
+    run = diff_parser.add_mutually_exclusive_group()
+    run.add_argument("--run", type=int, help="run to check (default: the latest)")
+    run.add_argument("--label", help="check the latest run with this label")
+    baseline = diff_parser.add_mutually_exclusive_group()
+    baseline.add_argument("--baseline", type=int, help="baseline run id")
+    baseline.add_argument("--last", type=int, default=1,
+                          help="compare with the last N runs before it with the same label "
+                               "and backend (default: 1)")
+    args = parser.parse_args(argv[1:])
+
+    if not os.path.exists(args.db):
+        print(f"No speech store at {args.db}")
+        return 1
+    store = SpeechBaseline(args.db)
+    try:
+        if args.command == "runs":
+            for run in store.runs(args.limit, args.label):
+                print(f"{run['id']:>6}  {run['started_at']}  {run['records']:>6} records  "
+                      f"{run['backend'] or '-'}  {run['label'] or ''}")
+            return 0
+
+        run_id = args.run if args.run is not None else store.latest_run(args.label)
+        if run_id is None:
+            print("The speech store has no runs" if args.label is None
+                  else f"The speech store has no runs labelled {args.label}")
+            return 1
+        differences = store.diff(run_id, args.baseline, args.last)
+        for difference in differences:
+            print(f"{difference['status']:<8} {difference['page']}  {difference['element']}")
+            if difference["status"] != "added":
+                print(f"    baseline: {difference['baseline']}")
+            if difference["status"] != "removed":
+                print(f"    current:  {difference['current']}")
+        print(f"\n{len(differences)} differences in run {run_id}")
+        return 1 if differences else 0
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
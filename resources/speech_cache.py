@@ -0,0 +1,111 @@
+"""
+On-disk cache of captured speech
+Speech is keyed by a hash of the backend, the selector and the element's
+accessibility properties, so an element whose role, name and state have not
+changed since the last run can skip the screen reader entirely, and speech
+from a mock is never served to a run against the real screen reader.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+
+# Accessibility properties that influence what the screen reader announces
+RELEVANT_PROPERTIES = ("role", "name", "description", "value", "level", "state", "states")
+
+
+class SpeechCache:
+    """
+    Least recently used speech cache persisted as a JSON file
+
+    Entries beyond ``max_entries`` are evicted oldest first.
+    """
+
+    def __init__(self, path, max_entries=5000):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = OrderedDict(json.load(f))
+        except (OSError, ValueError):
+            # A damaged cache is only a missed optimization, start over
+            self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(selector, properties, backend=None):
+        """Hash the backend and selector together with the relevant accessibility properties"""
+        relevant = {name: properties[name] for name in RELEVANT_PROPERTIES if name in properties}
+        payload = json.dumps({"backend": backend, "selector": selector, "properties": relevant},
+                             sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, selector, properties, backend=None):
+        """Return speech cached for the element on ``backend``, or None on a miss"""
+        key = self.make_key(selector, properties, backend)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry["speech"]
+
+    def put(self, selector, properties, speech, backend=None):
+        """Store speech captured for the element on ``backend``, evicting the oldest entries if full"""
+        key = self.make_key(selector, properties, backend)
+        self._entries[key] = {
+            "backend": backend,
+            "selector": selector,
+            "speech": speech,
+            "stored_at": datetime.now().isoformat()
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True
+
+    def invalidate(self, selector=None):
+        """Drop the entries for one selector, or everything when no selector is given"""
+        if selector is None:
+            removed = len(self._entries)
+            self._entries.clear()
+        else:
+            stale = [key for key, entry in self._entries.items() if entry["selector"] == selector]
+            for key in stale:
+                del self._entries[key]
+            removed = len(stale)
+        self._dirty = self._dirty or removed > 0
+        return removed
+
+    def save(self):
+        """Write the cache to disk if it changed"""
+        if not self._dirty:
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of our own, suites running in parallel may save at the same time
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(self.path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._entries)
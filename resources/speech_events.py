@@ -0,0 +1,130 @@
+"""
+Background consumer for the bridge's speech event stream
+Subscribes to the bridge's /events Server-Sent Events endpoint on a daemon
+thread and keeps the most recent utterances in a bounded ring buffer, so
+callers can ask for everything spoken since a sequence number without polling.
+"""
+
+import json
+import time
+import socket
+import logging
+import threading
+import http.client
+from collections import deque
+from urllib.parse import urlsplit
+
+logger = logging.getLogger("SpeechEvents")
+
+
+class SpeechEventStream:
+    """
+    Ring buffer of utterances fed from the bridge's /events stream
+
+    Each utterance is a dictionary with ``seq``, ``timestamp`` and ``speech``.
+    The stream reconnects with the last seen sequence number if the
+    connection drops, so the bridge replays anything missed in between.
+    """
+
+    def __init__(self, bridge_url, buffer_size=1000, connect_timeout=2, read_timeout=60):
+        self.bridge_url = bridge_url
+        self.timeout = (connect_timeout, read_timeout)
+        self.events = deque(maxlen=int(buffer_size))
+        self.last_sequence = 0
+        self._condition = threading.Condition()
+        self._stopping = threading.Event()
+        self._connection = None
+        self._thread = None
+
+    def start(self):
+        """Start consuming events on a background thread"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="speech-events", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Disconnect from the bridge and wait for the thread to finish"""
+        self._stopping.set()
+        # Shutting the socket down wakes the reader thread out of its blocking read
+        connection = self._connection
+        if connection is not None and connection.sock is not None:
+            try:
+                connection.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        delay = 0.1
+        while not self._stopping.is_set():
+            try:
+                self._consume()
+                delay = 0.1
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                # Shutting the socket down from stop() surfaces as an error here too
+                if self._stopping.is_set():
+                    break
+                logger.warning(f"Speech event stream interrupted: {e}")
+            if not self._stopping.wait(delay):
+                delay = min(delay * 2, 2.0)
+
+    def _consume(self):
+        """Read events until the connection ends"""
+        address = urlsplit(self.bridge_url)
+        self._connection = http.client.HTTPConnection(address.hostname, address.port,
+                                                      timeout=self.timeout[0])
+        try:
+            self._connection.request("GET", f"/events?since={self.last_sequence}",
+                                     headers={"Accept": "text/event-stream"})
+            response = self._connection.getresponse()
+            if response.status != 200:
+                raise http.client.HTTPException(f"/events answered {response.status}")
+            # Heartbeats arrive well within the read timeout on a healthy stream
+            self._connection.sock.settimeout(self.timeout[1])
+
+            data_lines = []
+            while not self._stopping.is_set():
+                raw_line = response.readline()
+                if not raw_line:
+                    return
+                line = raw_line.decode("utf-8").rstrip("\r\n")
+                if line == "":
+                    # A blank line ends an event
+                    if data_lines:
+                        self._add(json.loads("\n".join(data_lines)))
+                        data_lines = []
+                elif line.startswith("data:"):
+                    data_lines.append(line[5:].lstrip())
+        finally:
+            self._connection.close()
+
+    def _add(self, event):
+        with self._condition:
+            if event["seq"] <= self.last_sequence:
+                return
+            self.events.append(event)
+            self.last_sequence = event["seq"]
+            self._condition.notify_all()
+
+    def since(self, sequence=0):
+        """Return buffered utterances with a sequence number above ``sequence``"""
+        sequence = int(sequence)
+        with self._condition:
+            return [event for event in self.events if event["seq"] > sequence]
+
+    def wait_for(self, sequence=0, timeout=5):
+        """
+        Block until an utterance after ``sequence`` arrives or ``timeout`` passes
+
+        Returns the utterances after ``sequence`` (possibly none).
+        """
+        deadline = time.monotonic() + float(timeout)
+        with self._condition:
+            while self.last_sequence <= int(sequence):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+        return self.since(sequence)
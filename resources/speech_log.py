@@ -0,0 +1,121 @@
+"""
+Append-only JSON Lines speech log
+Every record is written as one line and flushed as soon as it is logged, so a
+crash loses at most the record being written. Optionally rotates the file when
+it grows past a size limit and gzips the rotated segments.
+"""
+
+import os
+import sys
+import json
+import gzip
+import glob
+import shutil
+
+
+class SpeechLogWriter:
+    """
+    Buffered JSON Lines writer with optional size-based rotation
+
+    Rotated segments are named ``<path>.1``, ``<path>.2``, ... (with a ``.gz``
+    suffix when compressed), oldest first.
+    """
+
+    def __init__(self, path, max_bytes=0, compress=True, buffer_size=64 * 1024):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.records_written = 0
+        self._segment = len(_rotated_segments(path))
+        self._file = None
+        self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8", buffering=self.buffer_size)
+        self._size = self._file.tell()
+
+    def write(self, record):
+        """Append a record and flush it to disk"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        self._file.write(line)
+        self._file.flush()
+        self._size += len(line.encode("utf-8"))
+        self.records_written += 1
+        if self.max_bytes and self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Move the current file aside as the next segment and start a new one"""
+        self._file.close()
+        self._segment += 1
+        rotated = f"{self.path}.{self._segment}"
+        os.replace(self.path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+        self._open()
+
+    def close(self):
+        """Flush and close the log file"""
+        if self._file and not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _rotated_segments(path):
+    """Return the rotated segment files for a log, oldest first"""
+    segments = []
+    for candidate in glob.glob(glob.escape(path) + ".*"):
+        suffix = candidate[len(path) + 1:]
+        if suffix.endswith(".gz"):
+            suffix = suffix[:-3]
+        if suffix.isdigit():
+            segments.append((int(suffix), candidate))
+    return [name for _, name in sorted(segments)]
+
+
+def iter_speech_log(path):
+    """
+    Stream records back from a speech log, including rotated segments
+
+    Records are yielded one at a time in the order they were written.
+    """
+    for name in _rotated_segments(path) + [path]:
+        if not os.path.exists(name):
+            continue
+        opener = gzip.open if name.endswith(".gz") else open
+        with opener(name, "rt", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def main(argv):
+    """Print a short report of a speech log: records, then pass/fail totals"""
+    if len(argv) != 2:
+        print("Usage: python speech_log.py <path to speech_log.jsonl>")
+        return 1
+
+    total = verified = failed = 0
+    for record in iter_speech_log(argv[1]):
+        total += 1
+        if "passed" in record:
+            verified += 1
+            if not record["passed"]:
+                failed += 1
+        print(json.dumps(record, ensure_ascii=False))
+    print(f"\n{total} records, {verified} verifications, {failed} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
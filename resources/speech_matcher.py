@@ -0,0 +1,194 @@
+"""
+Speech expectation matching
+Compiles expected screen reader output once and checks captured speech
+against it, returning structured results that describe every mismatch.
+
+An expectation is either a plain string, which must appear in the speech
+as-is, or a dictionary combining any of these checks:
+
+    contains   substring that must appear in the speech
+    normalized substring compared case-insensitively, ignoring punctuation
+    regex      regular expression searched for in the speech
+    tokens     words that must all be spoken, in any order
+    fuzzy      phrase the speech must resemble (see ``threshold``, default 0.8)
+    role       role announced by the screen reader, e.g. "button"
+    name       accessible name, e.g. "Login"
+    state      state or list of states, e.g. ["checked", "required"]; a state
+               spoken as "not checked" does not count
+"""
+
+import re
+import json
+import difflib
+
+DEFAULT_FUZZY_THRESHOLD = 0.8
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_speech(text):
+    """Lowercase text, drop punctuation and collapse whitespace"""
+    text = _PUNCTUATION.sub(" ", str(text).lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _word_pattern(phrase):
+    """Regex matching a normalized phrase as whole words"""
+    return re.compile(r"\b" + re.escape(normalize_speech(phrase)) + r"\b")
+
+
+def _state_pattern(state):
+    """Regex matching a normalized state as whole words, unless it is negated with "not" """
+    return re.compile(r"(?<!\bnot )\b" + re.escape(normalize_speech(state)) + r"\b")
+
+
+class SpeechExpectation:
+    """
+    Expectation for one element, compiled into a list of checks
+
+    Each check is a ``(name, expected, test)`` tuple where ``test`` takes the
+    raw and normalized speech and returns ``(passed, detail)``.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.checks = []
+        if isinstance(spec, str):
+            spec = {"contains": spec}
+        elif not isinstance(spec, dict):
+            raise ValueError(f"Unsupported expectation: {spec!r}")
+
+        for field, expected in spec.items():
+            if field == "contains":
+                self._add(field, expected, self._contains(expected))
+            elif field == "normalized":
+                self._add(field, expected, self._normalized(expected))
+            elif field == "regex":
+                self._add(field, expected, self._regex(expected))
+            elif field == "tokens":
+                self._add(field, expected, self._tokens(expected))
+            elif field == "fuzzy":
+                threshold = float(spec.get("threshold", DEFAULT_FUZZY_THRESHOLD))
+                self._add(field, expected, self._fuzzy(expected, threshold))
+            elif field in ("role", "name"):
+                self._add(field, expected, self._words(expected))
+            elif field == "state":
+                states = expected if isinstance(expected, list) else [expected]
+                for state in states:
+                    self._add(field, state, self._state(state))
+            elif field != "threshold":
+                raise ValueError(f"Unknown expectation field '{field}'")
+        if not self.checks:
+            # An expectation without checks would pass any speech
+            raise ValueError(f"Expectation has no checks: {self.spec!r}")
+
+    def _add(self, name, expected, test):
+        self.checks.append((name, expected, test))
+
+    @staticmethod
+    def _contains(expected):
+        return lambda speech, normalized: (expected in speech, None)
+
+    @staticmethod
+    def _normalized(expected):
+        target = normalize_speech(expected)
+        return lambda speech, normalized: (target in normalized, None)
+
+    @staticmethod
+    def _regex(expected):
+        pattern = re.compile(expected)
+        return lambda speech, normalized: (pattern.search(speech) is not None, None)
+
+    @staticmethod
+    def _tokens(expected):
+        words = expected.split() if isinstance(expected, str) else expected
+        required = frozenset(normalize_speech(" ".join(words)).split())
+
+        def test(speech, normalized):
+            missing = required.difference(normalized.split())
+            return not missing, {"missing": sorted(missing)} if missing else None
+        return test
+
+    @staticmethod
+    def _fuzzy(expected, threshold):
+        target = normalize_speech(expected)
+
+        def test(speech, normalized):
+            matcher = difflib.SequenceMatcher(None, target, normalized)
+            # quick_ratio is a cheap upper bound, skip the full ratio when it already fails
+            if matcher.quick_ratio() < threshold:
+                return False, {"score": round(matcher.quick_ratio(), 3), "threshold": threshold}
+            score = matcher.ratio()
+            return score >= threshold, {"score": round(score, 3), "threshold": threshold}
+        return test
+
+    @staticmethod
+    def _words(expected):
+        pattern = _word_pattern(expected)
+        return lambda speech, normalized: (pattern.search(normalized) is not None, None)
+
+    @staticmethod
+    def _state(expected):
+        pattern = _state_pattern(expected)
+        return lambda speech, normalized: (pattern.search(normalized) is not None, None)
+
+    def match(self, speech):
+        """Run every check and return the list of failed checks as diffs"""
+        speech = speech or ""
+        normalized = normalize_speech(speech)
+        diffs = []
+        for name, expected, test in self.checks:
+            passed, detail = test(speech, normalized)
+            if not passed:
+                diff = {"check": name, "expected": expected, "actual": speech}
+                if detail:
+                    diff.update(detail)
+                diffs.append(diff)
+        return diffs
+
+
+class SpeechMatcher:
+    """Catalogue of compiled expectations indexed by element id"""
+
+    def __init__(self, expectations=None):
+        self.expectations = {}
+        for element_id, spec in (expectations or {}).items():
+            self.add(element_id, spec)
+
+    @classmethod
+    def from_file(cls, file_path):
+        """Load and compile expectations from a JSON file"""
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def add(self, element_id, spec):
+        """Compile and register the expectation for an element"""
+        self.expectations[element_id] = SpeechExpectation(spec)
+
+    def __contains__(self, element_id):
+        return element_id in self.expectations
+
+    def match(self, element_id, speech, expectation=None):
+        """
+        Check speech against an element's expectation
+
+        ``expectation`` overrides the catalogue entry and may be a spec or an
+        already compiled SpeechExpectation. Returns a dictionary with the
+        element id, actual speech, expectation, ``passed`` flag and ``diffs``.
+        """
+        if expectation is None:
+            if element_id not in self.expectations:
+                raise KeyError(element_id)
+            expectation = self.expectations[element_id]
+        elif not isinstance(expectation, SpeechExpectation):
+            expectation = SpeechExpectation(expectation)
+
+        diffs = expectation.match(speech)
+        return {
+            "element_id": element_id,
+            "actual": speech,
+            "expected": expectation.spec,
+            "passed": not diffs,
+            "diffs": diffs
+        }
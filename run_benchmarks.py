@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for GuidepupLibrary against the mock NVDA bridge
+
+Measures cold and warm startup, elements per second for the main keywords
+and memory growth of the speech log over long runs. The mock bridge can be
+given artificial screen reader latency and jitter so results resemble a real
+screen reader. Results are written as JSON so runs can be compared across
+commits.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import tracemalloc
+import subprocess
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources"))
+
+from GuidepupLibrary import GuidepupLibrary
+from latency_stats import percentile
+from nvda_backends import find_free_port
+
+# Selectors the mock bridge knows, focused round robin
+with open(os.path.join("resources", "mock_responses.json"), encoding="utf-8") as f:
+    SELECTORS = list(json.load(f))
+
+def write_catalogue(size, path):
+    """Write a response catalogue imitating a large page and return its selectors."""
+    exact = {f"#element-{index}": f"edit field, element {index}" for index in range(size)}
+    catalogue = {
+        "exact": exact,
+        "prefix": {"#list-item-": "list item", "#link-": "link"},
+        "patterns": {"h[1-6]": "heading"}
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(catalogue, f)
+    return list(exact) + ["#list-item-1", "#link-1", "h2"]
+
+def quietly(enabled):
+    """Silence the library's console output while benchmarking."""
+    if not enabled:
+        return contextlib.nullcontext()
+    return contextlib.redirect_stdout(open(os.devnull, "w"))
+
+def describe(samples):
+    """Summarise durations in seconds as milliseconds."""
+    ordered = sorted(sample * 1000.0 for sample in samples)
+    return {
+        "runs": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "max_ms": round(ordered[-1], 3)
+    }
+
+def make_library(args, **options):
+    return GuidepupLibrary(use_mock=True, speech_quiet_period=args.quiet_period,
+                           log_max_bytes=args.log_max_bytes, **options)
+
+def bench_cold_startup(args):
+    """Start a fresh bridge for every run."""
+    samples = []
+    for _ in range(args.startup_runs):
+        library = make_library(args, bridge_port=0)
+        started = time.perf_counter()
+        library.initialize_nvda()
+        samples.append(time.perf_counter() - started)
+        library.shutdown_nvda()
+    return describe(samples)
+
+def bench_warm_startup(args):
+    """Attach to a bridge daemon that is already running."""
+    port = find_free_port()
+    library = make_library(args, bridge_port=port, reuse_bridge=True)
+    # The first run starts the daemon, the measured ones attach to it
+    library.initialize_nvda()
+    library.shutdown_nvda()
+
+    samples = []
+    try:
+        for _ in range(args.startup_runs):
+            library = make_library(args, bridge_port=port, reuse_bridge=True)
+            started = time.perf_counter()
+            library.initialize_nvda()
+            samples.append(time.perf_counter() - started)
+            library.shutdown_nvda()
+    finally:
+        library.stop_bridge_daemon()
+    return describe(samples)
+
+def throughput(library, operation, count, elapsed):
+    stats = library.get_latency_stats().get(f"keyword:{operation}", {})
+    return {
+        "elements": count,
+        "seconds": round(elapsed, 3),
+        "elements_per_second": round(count / elapsed, 2) if elapsed else None,
+        "latency": stats
+    }
+
+def bench_keywords(args):
+    """Elements per second for Focus Element, Verify Element Speech and batched capture."""
+    library = make_library(args, bridge_port=0)
+    library.initialize_nvda()
+    try:
+        results = {}
+
+        started = time.perf_counter()
+        for index in range(args.elements):
+            library.focus_element(SELECTORS[index % len(SELECTORS)])
+        results["focus_element"] = throughput(library, "focus_element", args.elements,
+                                              time.perf_counter() - started)
+
+        library.load_expected_results(os.path.join("resources", "expected_results.json"))
+        library.focus_element("h1")
+        started = time.perf_counter()
+        for _ in range(args.elements):
+            library.verify_element_speech("heading", fail_on_mismatch=False)
+        results["verify_element_speech"] = throughput(library, "verify_element_speech", args.elements,
+                                                      time.perf_counter() - started)
+
+        selectors = [SELECTORS[index % len(SELECTORS)] for index in range(args.elements)]
+        started = time.perf_counter()
+        library.capture_speech_for_elements(selectors)
+        results["capture_speech_for_elements"] = throughput(library, "capture_speech_for_elements",
+                                                            args.elements, time.perf_counter() - started)
+        return results
+    finally:
+        library.shutdown_nvda()
+
+def bench_speech_log_memory(args):
+    """
+    Track memory while logging a long run of focused elements
+
+    Uses the in-process mock so the run is limited by the library and its
+    speech log rather than by the bridge.
+    """
+    library = make_library(args, backend="inprocess")
+    library.initialize_nvda()
+    interval = max(args.log_records // 10, 1)
+    samples = []
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        for index in range(args.log_records):
+            library.focus_element(SELECTORS[index % len(SELECTORS)])
+            if (index + 1) % interval == 0:
+                samples.append({"records": index + 1,
+                                "bytes": tracemalloc.get_traced_memory()[0] - baseline})
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+        library.shutdown_nvda()
+
+    # Growth over the second half of the run shows whether memory keeps climbing
+    halfway = samples[len(samples) // 2 - 1] if len(samples) > 1 else samples[0]
+    late_growth = samples[-1]["bytes"] - halfway["bytes"]
+    late_records = samples[-1]["records"] - halfway["records"]
+    return {
+        "records": args.log_records,
+        "growth_bytes": samples[-1]["bytes"],
+        "peak_bytes": peak,
+        "late_bytes_per_1000_records": round(late_growth * 1000 / late_records, 1) if late_records else 0.0,
+        "samples": samples
+    }
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def node_version():
+    try:
+        result = subprocess.run(["node", "--version"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+BENCHMARKS = {
+    "cold_startup": bench_cold_startup,
+    "warm_startup": bench_warm_startup,
+    "keywords": bench_keywords,
+    "speech_log_memory": bench_speech_log_memory
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark GuidepupLibrary against the mock NVDA bridge")
+    parser.add_argument("--elements", type=int, default=200,
+                        help="elements per keyword throughput run (default: 200)")
+    parser.add_argument("--startup-runs", type=int, default=5,
+                        help="measured runs for each startup benchmark (default: 5)")
+    parser.add_argument("--log-records", type=int, default=20000,
+                        help="records logged in the speech log memory run (default: 20000)")
+    parser.add_argument("--log-max-bytes", type=int, default=0,
+                        help="rotate the speech log at this size, 0 to never rotate (default: 0)")
+    parser.add_argument("--latency-ms", type=float, default=0,
+                        help="artificial screen reader latency added by the mock (default: 0)")
+    parser.add_argument("--jitter-ms", type=float, default=0,
+                        help="random extra latency of up to this many ms (default: 0)")
+    parser.add_argument("--quiet-period", type=float, default=0.05,
+                        help="seconds of silence that count as speech settled (default: 0.05)")
+    parser.add_argument("--catalogue-size", type=int, default=0,
+                        help="serve a generated response catalogue with this many elements "
+                        "instead of mock_responses.json")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="run only the named benchmark, may be repeated")
+    parser.add_argument("--output", help="where to write the JSON results "
+                        "(default: results/benchmarks/bench_<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="show the library's output")
+    args = parser.parse_args()
+
+    global SELECTORS
+    if args.catalogue_size:
+        catalogue_path = os.path.join("results", "benchmarks", f"catalogue_{args.catalogue_size}.json")
+        SELECTORS = write_catalogue(args.catalogue_size, catalogue_path)
+        os.environ["MOCK_NVDA_CATALOGUES"] = os.path.abspath(catalogue_path)
+
+    # The mock bridge reads its artificial latency from the environment it inherits
+    os.environ["MOCK_NVDA_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["MOCK_NVDA_JITTER_MS"] = str(args.jitter_ms)
+
+    current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_path = args.output or os.path.join("results", "benchmarks", f"bench_{current_time}.json")
+
+    report = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "commit": git_commit(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "node": node_version(),
+        "config": {
+            "elements": args.elements,
+            "startup_runs": args.startup_runs,
+            "log_records": args.log_records,
+            "log_max_bytes": args.log_max_bytes,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "quiet_period": args.quiet_period,
+            "catalogue_size": args.catalogue_size or len(SELECTORS)
+        },
+        "results": {}
+    }
+
+    for name in sorted(BENCHMARKS):
+        if args.only and name not in args.only:
+            continue
+        print(f"Running {name}...")
+        with quietly(not args.verbose):
+            report["results"][name] = BENCHMARKS[name](args)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"Benchmark results written to {output_path}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
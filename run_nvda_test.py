@@ -3,7 +3,14 @@ import os
 import sys
 import subprocess
 import datetime
-import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources"))
+
+from nvda_direct import NVDADirect
+from process_utils import run_in_group
+
+# Maximum time to wait for NVDA to come up before giving up
+NVDA_STARTUP_TIMEOUT = 30
 
 def main():
     print("Starting accessibility testing with real NVDA...")
@@ -16,26 +23,12 @@ def main():
         print(f"Error: NVDA not found at {nvda_path}")
         return 1
     
-    # Check if NVDA is already running
+    nvda = NVDADirect(nvda_path=nvda_path, startup_timeout=NVDA_STARTUP_TIMEOUT)
     try:
-        nvda_running = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq nvda.exe'], 
-                                     capture_output=True, text=True).stdout
-        if 'nvda.exe' in nvda_running:
-            print("NVDA is already running. Stopping existing instance...")
-            subprocess.run(['taskkill', '/IM', 'nvda.exe', '/F'], capture_output=True)
-            time.sleep(2)  # Wait for process to terminate
-    except Exception as e:
-        print(f"Error checking NVDA status: {e}")
-    
-    nvda_process = None
-    try:
-        # Start NVDA first
+        # Start NVDA first, quitting any instance that is already running
         print(f"Starting NVDA from {nvda_path}...")
-        nvda_process = subprocess.Popen([nvda_path], shell=True)
-        
-        # Give NVDA time to start
-        print("Waiting for NVDA to initialize (5 seconds)...")
-        time.sleep(5)
+        print(f"Waiting for NVDA to initialize (up to {NVDA_STARTUP_TIMEOUT} seconds)...")
+        nvda.start()
         
         # Current time for output directory
         current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -44,6 +37,8 @@ def main():
         
         # Set environment variable to tell Robot Framework that NVDA is already running
         os.environ["NVDA_ALREADY_RUNNING"] = "true"
+        # The suite attaches to this NVDA and reads its speech from the same log
+        os.environ["NVDA_LOG_PATH"] = nvda.log_path
         
         # Run Robot Framework test with real NVDA
         print("Running Robot Framework test with real NVDA...")
@@ -54,7 +49,9 @@ def main():
             "tests/real_nvda_test.robot"
         ]
         
-        subprocess.run(robot_cmd, check=True)
+        returncode = run_in_group(robot_cmd)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, robot_cmd)
         print(f"Test completed. Results available in {output_dir}")
         
     except subprocess.CalledProcessError as e:
@@ -64,26 +61,13 @@ def main():
         print(f"Unexpected error: {e}")
         return 1
     finally:
-        # Always try to stop NVDA when done
+        # Always stop NVDA when done, returning as soon as it has exited
         print("Stopping NVDA...")
-        try:
-            # Clear the environment variable
-            if "NVDA_ALREADY_RUNNING" in os.environ:
-                del os.environ["NVDA_ALREADY_RUNNING"]
-                
-            subprocess.run(['taskkill', '/IM', 'nvda.exe', '/F'], capture_output=True)
-            
-            # Wait for NVDA to fully close
-            time.sleep(2)
-            
-            # Verify NVDA is closed
-            nvda_running = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq nvda.exe'], 
-                                         capture_output=True, text=True).stdout
-            if 'nvda.exe' in nvda_running:
-                print("Warning: NVDA is still running. Attempting to force close...")
-                subprocess.run(['taskkill', '/IM', 'nvda.exe', '/F', '/T'], capture_output=True)
-        except Exception as e:
-            print(f"Error stopping NVDA: {e}")
+        # Clear the environment variable
+        if "NVDA_ALREADY_RUNNING" in os.environ:
+            del os.environ["NVDA_ALREADY_RUNNING"]
+        if not nvda.stop():
+            print("Error stopping NVDA")
     
     return 0
 
@@ -1,29 +1,142 @@
 #!/usr/bin/env python3
 import os
 import sys
-import subprocess
+import glob
+import argparse
 import datetime
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources"))
+
+from nvda_backends import find_free_port
+from process_utils import popen_group, run_in_group, stop_process_group, recorded_names, reap_recorded
+
+# Robot processes of the parallel workers, stopped together if we are interrupted
+running = []
+running_lock = threading.Lock()
+
+def reap_bridges():
+    """Stop the bridges of interrupted suites, which run in process groups of their own."""
+    for name in recorded_names():
+        # A reused bridge daemon is meant to outlive the run
+        if not name.startswith("bridge_daemon_"):
+            reap_recorded(name)
+
+# Backends that can run once per worker; direct and bridge drive the one NVDA on the machine
+PARALLEL_BACKENDS = ("mock", "inprocess")
+
+def run_suite(index, suite, output_dir, backend):
+    """Run one suite file in its own robot process with its own bridge port."""
+    name = os.path.splitext(os.path.basename(suite))[0]
+    worker_dir = os.path.join(output_dir, f"{index:02d}_{name}")
+    env = dict(os.environ, GUIDEPUP_BRIDGE_PORT=str(find_free_port()), GUIDEPUP_BACKEND=backend)
+
+    command = [
+        "robot",
+        "--outputdir", worker_dir,
+        "--loglevel", "DEBUG",
+        "--report", "NONE",
+        "--log", "NONE",
+        suite
+    ]
+    print(f"Starting {suite} on bridge port {env['GUIDEPUP_BRIDGE_PORT']}")
+    process = popen_group(command, env=env)
+    with running_lock:
+        running.append(process)
+    try:
+        returncode = process.wait()
+    finally:
+        with running_lock:
+            running.remove(process)
+    return os.path.join(worker_dir, "output.xml"), returncode
+
+def run_parallel(suites, output_dir, processes, backend):
+    """Run suites side by side and merge their results into one report."""
+    with ThreadPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(run_suite, index, suite, output_dir, backend)
+                   for index, suite in enumerate(suites)]
+        try:
+            results = [future.result() for future in futures]
+        except KeyboardInterrupt:
+            # Workers are in their own process groups, Ctrl+C only reached us
+            for future in futures:
+                future.cancel()
+            with running_lock:
+                processes_left = list(running)
+            for process in processes_left:
+                stop_process_group(process)
+            reap_bridges()
+            raise
+
+    outputs = [output for output, _ in results if os.path.exists(output)]
+    if not outputs:
+        print("No suite produced any output")
+        return 1
+
+    # Merge the per-suite outputs into a single log and report
+    merge = ["rebot", "--outputdir", output_dir, "--output", "output.xml",
+             "--name", "Tests"] + outputs
+    subprocess.run(merge)
+
+    return max(code for _, code in results)
 
 def main():
+    parser = argparse.ArgumentParser(description="Run the accessibility test suites")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="number of suites to run in parallel (default: 1, serial)")
+    parser.add_argument("suites", nargs="*", default=["tests"],
+                        help="suite files or directories to run (default: tests)")
+    args = parser.parse_args()
+
+    if args.processes > 1:
+        # Every worker would start, and reap, the same NVDA; only mocks can run side by side
+        backend = os.environ.get("GUIDEPUP_BACKEND") or "mock"
+        if backend not in PARALLEL_BACKENDS:
+            print(f"Error: --processes needs a mock backend ({', '.join(PARALLEL_BACKENDS)}), "
+                  f"GUIDEPUP_BACKEND is '{backend}'")
+            sys.exit(1)
+
     current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
     output_dir = os.path.join("results", f"run_{current_time}")
-    
+
     os.makedirs(output_dir, exist_ok=True)
-    
+
+    if args.processes > 1:
+        # Expand directories into their suite files so each gets a worker
+        suites = []
+        for path in args.suites:
+            if os.path.isdir(path):
+                suites.extend(sorted(glob.glob(os.path.join(path, "*.robot"))))
+            else:
+                suites.append(path)
+
+        returncode = run_parallel(suites, output_dir, args.processes, backend)
+        if returncode != 0:
+            print(f"Error running tests: exit code {returncode}")
+            sys.exit(1)
+        print(f"Tests completed. Results available in {output_dir}")
+        return
+
     # Run Robot Framework tests
     command = [
         "robot",
         "--outputdir", output_dir,
-        "--loglevel", "DEBUG",
-        "tests"
-    ]
-    
+        "--loglevel", "DEBUG"
+    ] + args.suites
+
+    # Robot runs in a process group that is stopped if we are interrupted; the bridges it
+    # starts have groups of their own and are reaped through their PID files
     try:
-        subprocess.run(command, check=True)
-        print(f"Tests completed. Results available in {output_dir}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error running tests: {e}")
+        returncode = run_in_group(command)
+    except KeyboardInterrupt:
+        reap_bridges()
+        raise
+    if returncode != 0:
+        print(f"Error running tests: exit code {returncode}")
         sys.exit(1)
+    print(f"Tests completed. Results available in {output_dir}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
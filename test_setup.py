@@ -28,7 +28,16 @@ def main():
     try:
         # Wait for the server to start
         print("Starting Node.js mock NVDA bridge server...")
-        time.sleep(5)  # Give more time to start
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                requests.get("http://localhost:3000/version", timeout=1)
+                break
+            except requests.exceptions.RequestException:
+                if bridge_process.poll() is not None or time.monotonic() >= deadline:
+                    print("Mock NVDA bridge did not start")
+                    return 1
+                time.sleep(0.1)
         
         # Test if the server is running
         try:
@@ -0,0 +1,109 @@
+"""
+Tests for the NVDA log tailer against synthetic log files
+Run with: python -m unittest tests.test_nvda_log_tail
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "resources"))
+
+import nvda_log_tail
+from nvda_log_tail import NVDALogTailer, parse_speech_sequence
+
+
+def speech_entry(words, clock="10:15:32.118"):
+    """A speech entry as NVDA writes it at the IO log level"""
+    return (f"IO - speech.speech.speak ({clock}) - MainThread (10896):\n"
+            f"Speaking {words!r}\n")
+
+
+def info_entry(message, clock="10:15:30.000"):
+    return f"INFO - core.main ({clock}) - MainThread (10896):\n{message}\n"
+
+
+class NVDALogTailerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "nvda.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def append(self, text):
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            f.write(text)
+
+    def spoken(self, tailer):
+        return [utterance["speech"] for utterance in tailer.read()]
+
+    def test_reads_only_what_was_appended_since_the_last_read(self):
+        self.append(speech_entry(["Old", "button"]))
+        tailer = NVDALogTailer(self.path, from_end=True)
+        self.assertEqual(self.spoken(tailer), [])
+
+        self.append(info_entry("NVDA initialized") + speech_entry(["Login", "button"]))
+        self.assertEqual(self.spoken(tailer), ["Login, button"])
+        self.assertTrue(tailer.initialized)
+        self.assertEqual(self.spoken(tailer), [])
+
+    def test_partial_lines_are_kept_until_completed(self):
+        tailer = NVDALogTailer(self.path, from_end=False)
+        entry = speech_entry(["Remember me", "check box", "not checked"])
+        header_end = entry.index("\n") + 1
+
+        # Half a header, then the rest of it, then half the speech line
+        self.append(entry[:20])
+        self.assertEqual(self.spoken(tailer), [])
+        self.append(entry[20:header_end + 12])
+        self.assertEqual(self.spoken(tailer), [])
+        self.append(entry[header_end + 12:])
+        self.assertEqual(self.spoken(tailer), ["Remember me, check box, not checked"])
+
+    def test_replaced_file_is_read_from_the_start(self):
+        self.append(speech_entry(["First"]))
+        tailer = NVDALogTailer(self.path, from_end=False)
+        self.assertEqual(self.spoken(tailer), ["First"])
+
+        # NVDA moves nvda.log to nvda-old.log on startup and starts a new file
+        os.replace(self.path, os.path.join(self.directory, "nvda-old.log"))
+        self.append(speech_entry(["Second"]) + info_entry("padding " * 20))
+        self.assertEqual(self.spoken(tailer), ["Second"])
+
+    def test_truncated_file_is_read_from_the_start(self):
+        self.append(info_entry("padding " * 50) + speech_entry(["Before"]))
+        tailer = NVDALogTailer(self.path, from_end=False)
+        self.assertEqual(self.spoken(tailer), ["Before"])
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(speech_entry(["After"]))
+        self.assertEqual(self.spoken(tailer), ["After"])
+
+    def test_entries_across_the_read_chunk_boundary(self):
+        chunk_size = nvda_log_tail.READ_CHUNK_SIZE
+        filler = info_entry("x" * 100)
+        entry = speech_entry(["Across", "the boundary"])
+        for split in (10, entry.index("\n") + 1, len(entry) - 5):
+            with self.subTest(split=split):
+                # Pad so the chunk boundary falls `split` characters into the entry
+                padding = chunk_size - split
+                text = filler * (padding // len(filler))
+                text += info_entry("y" * (padding - len(text) - len(info_entry(""))))
+                self.assertEqual(len(text), padding)
+                with open(self.path, "w", encoding="utf-8", newline="") as f:
+                    f.write(text + entry + speech_entry(["After", "it"]))
+
+                tailer = NVDALogTailer(self.path, from_end=False)
+                self.assertEqual(self.spoken(tailer), ["Across, the boundary", "After, it"])
+
+    def test_speech_commands_are_not_spoken(self):
+        sequence = "[LangChangeCommand ('en_GB'), 'Welcome', CancellableSpeech (still valid), 'heading']"
+        self.assertEqual(parse_speech_sequence(sequence), ["Welcome", "heading"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+Tests for Start Speech Capture / Await Speech against the Guidepup bridge
+The bridge runs with a stub @guidepup/guidepup module, so only Node.js is needed.
+Run with: python -m unittest tests.test_speech_capture
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import unittest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, "resources"))
+
+from GuidepupLibrary import GuidepupLibrary
+
+# Stands in for NVDA: every act and key press is spoken after a short delay
+STUB_GUIDEPUP = """
+const log = [];
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+let acts = 0;
+exports.nvda = {
+    async start() {},
+    async stop() {},
+    async act() { await sleep(20); log.push(`acted ${acts++}`); },
+    async press(key) { await sleep(20); log.push(`pressed ${key}`); },
+    async lastSpokenPhrase() { return log[log.length - 1] || ''; },
+    async spokenPhraseLog() { return log.slice(); },
+    async clearSpokenPhraseLog() { log.length = 0; },
+    async clearItemTextLog() {}
+};
+"""
+
+
+@unittest.skipUnless(shutil.which("node"), "Node.js is needed to run the bridge")
+class SpeechCaptureTest(unittest.TestCase):
+
+    def setUp(self):
+        # The library starts resources/guidepup_bridge.js and writes results/ relative to the cwd
+        self.directory = tempfile.mkdtemp()
+        os.symlink(os.path.join(REPO_DIR, "resources"), os.path.join(self.directory, "resources"))
+        stub_dir = os.path.join(self.directory, "node_modules", "@guidepup", "guidepup")
+        os.makedirs(stub_dir)
+        with open(os.path.join(stub_dir, "index.js"), "w", encoding="utf-8") as f:
+            f.write(STUB_GUIDEPUP)
+
+        self.previous_cwd = os.getcwd()
+        self.previous_node_path = os.environ.get("NODE_PATH")
+        os.chdir(self.directory)
+        os.environ["NODE_PATH"] = os.path.join(self.directory, "node_modules")
+
+        self.library = GuidepupLibrary(backend="bridge", bridge_port=0, speech_quiet_period=0.1)
+        self.library.initialize_nvda()
+
+    def tearDown(self):
+        self.library.shutdown_nvda()
+        os.chdir(self.previous_cwd)
+        if self.previous_node_path is None:
+            os.environ.pop("NODE_PATH", None)
+        else:
+            os.environ["NODE_PATH"] = self.previous_node_path
+        shutil.rmtree(self.directory)
+
+    def test_bridge_keyword_between_start_and_await(self):
+        self.library.focus_element("button")
+        self.library.start_speech_capture(timeout=3)
+        # A browser step runs while the capture is already listening
+        time.sleep(0.3)
+
+        # The press must not queue behind the capture, it is what the capture waits for
+        started = time.monotonic()
+        self.library.press_key("Tab")
+        self.assertLess(time.monotonic() - started, 1)
+
+        self.assertEqual(self.library.await_speech(), "pressed Tab")
+        self.assertLess(time.monotonic() - started, 2)
+
+    def test_named_captures(self):
+        self.library.start_speech_capture(timeout=3, name="tab")
+        self.library.press_key("Tab")
+        self.assertEqual(self.library.await_speech("tab"), "pressed Tab")
+        with self.assertRaises(Exception):
+            self.library.await_speech("tab")
+
+    def test_capture_polls_are_timed_apart_from_speak(self):
+        self.library.start_speech_capture(timeout=3)
+        self.library.press_key("Tab")
+        self.library.await_speech()
+        stats = self.library.get_latency_stats()
+        self.assertIn("http:/speak(capture)", stats)
+        # Only the mark taken when the capture started reads /speak itself
+        self.assertEqual(stats["http:/speak"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()